@@ -25,6 +25,7 @@ AWS_REGION_NAME = env("AWS_REGION_NAME")
 AWS_BUCKET_NAME = env("AWS_BUCKET_NAME")
 AWS_ENCRYPTION_TYPE = env("AWS_ENCRYPTION_TYPE")
 AWS_ENCRYPTION_KEY_ID = env("AWS_ENCRYPTION_KEY_ID")
+S3_MAX_POOL_CONNECTIONS = env.int("S3_MAX_POOL_CONNECTIONS", default=50)
 
 pymysql.install_as_MySQLdb()
 
@@ -33,7 +34,35 @@ pymysql.install_as_MySQLdb()
 SECURE_BROWSER_XSS_FILTER = True
 X_FRAME_OPTIONS = 'DENY'
 
-DATA_UPLOAD_MAX_MEMORY_SIZE = 2048  # Set max upload size to 2KB
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2048  # Max size of non-file request data; files are streamed to S3
+
+FILE_UPLOAD_MIN_SIZE = env.int("FILE_UPLOAD_MIN_SIZE", default=512)  # 0.5KB
+FILE_UPLOAD_MAX_SIZE = env.int("FILE_UPLOAD_MAX_SIZE", default=2048)  # 2KB
+S3_MULTIPART_PART_SIZE = env.int("S3_MULTIPART_PART_SIZE", default=8 * 1024 * 1024)  # S3 minimum is 5MB
+S3_STAGING_PREFIX = "staging/"
+S3_BLOB_PREFIX = "blobs/"
+LINE_INDEX_STRIDE = env.int("LINE_INDEX_STRIDE", default=256)  # lines between line index entries
+FILE_STORAGE_CODEC = env("FILE_STORAGE_CODEC", default="")  # "", "gzip" or "zstd" (needs zstandard)
+BLOB_GC_GRACE_PERIOD = env.int("BLOB_GC_GRACE_PERIOD", default=86400)  # seconds an unreferenced blob is kept
+FILE_UPLOAD_BATCH_MAX_FILES = env.int("FILE_UPLOAD_BATCH_MAX_FILES", default=50)
+FILE_UPLOAD_BATCH_WORKERS = env.int("FILE_UPLOAD_BATCH_WORKERS", default=8)  # concurrent S3 transfers per batch request
+PRESIGNED_UPLOAD_EXPIRY = env.int("PRESIGNED_UPLOAD_EXPIRY", default=300)  # seconds
+FILE_LIST_PAGE_SIZE = env.int("FILE_LIST_PAGE_SIZE", default=100)  # files per page of the list API
+FILE_LIST_MAX_PAGE_SIZE = env.int("FILE_LIST_MAX_PAGE_SIZE", default=1000)
+FILE_DOWNLOAD_MODE = env("FILE_DOWNLOAD_MODE", default="proxy")  # "proxy" streams through Django, "redirect" sends a presigned S3 URL
+PRESIGNED_DOWNLOAD_EXPIRY = env.int("PRESIGNED_DOWNLOAD_EXPIRY", default=300)  # seconds
+ACCESS_LOG_BUFFERED = env.bool("ACCESS_LOG_BUFFERED", default=True)  # write access logs in batches off the request path
+ACCESS_LOG_BATCH_SIZE = env.int("ACCESS_LOG_BATCH_SIZE", default=500)
+ACCESS_LOG_FLUSH_INTERVAL = env.float("ACCESS_LOG_FLUSH_INTERVAL", default=1.0)  # seconds
+ACCESS_LOG_MAX_PENDING = env.int("ACCESS_LOG_MAX_PENDING", default=10000)  # beyond this, rows are written synchronously
+ACCESS_LOG_RETENTION_DAYS = env.int("ACCESS_LOG_RETENTION_DAYS", default=30)  # raw rows older than this are rolled up per day
+ACCESS_LOG_COMPACT_BATCH_SIZE = env.int("ACCESS_LOG_COMPACT_BATCH_SIZE", default=5000)  # raw rows rolled up and deleted per transaction
+FILE_LIST_CACHE_TIMEOUT = env.int("FILE_LIST_CACHE_TIMEOUT", default=300)  # seconds
+FILE_LIST_CACHE_MAX_ENTRIES = env.int("FILE_LIST_CACHE_MAX_ENTRIES", default=10000)  # pages of file listings kept
+CONTENT_CACHE_MAX_BYTES = env.int("CONTENT_CACHE_MAX_BYTES", default=64 * 1024 * 1024)  # per process, 0 disables the cache
+CONTENT_CACHE_MAX_ITEM_BYTES = env.int("CONTENT_CACHE_MAX_ITEM_BYTES", default=1024 * 1024)  # larger objects are always streamed
+PENDING_UPLOAD_TIMEOUT = env.int("PENDING_UPLOAD_TIMEOUT", default=3600)  # seconds before an unfinished upload is reaped
+UPLOAD_SESSION_EXPIRY = env.int("UPLOAD_SESSION_EXPIRY", default=86400)  # seconds a resumable upload may sit idle
 
 LOGIN_URL = '/signin/'
 LOGIN_REDIRECT_URL = '/'
@@ -42,6 +71,8 @@ LOGOUT_REDIRECT_URL = 'signin'
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+UPLOAD_SESSION_DIR = env("UPLOAD_SESSION_DIR", default=str(BASE_DIR / 'upload_sessions'))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
@@ -144,6 +175,22 @@ DATABASES = {
     }
 }
 
+# Cached file listings. The local-memory default is per process: deployments
+# running more than one worker should point FILE_LIST_CACHE_URL at a shared
+# cache such as redis:// or pymemcache:// so every worker sees version bumps,
+# and bound its memory there (maxmemory with an LRU policy).
+FILE_LIST_CACHE = env.cache_url("FILE_LIST_CACHE_URL", default="locmemcache://file-lists")
+FILE_LIST_CACHE['TIMEOUT'] = FILE_LIST_CACHE_TIMEOUT
+if FILE_LIST_CACHE['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    FILE_LIST_CACHE.setdefault('OPTIONS', {})['MAX_ENTRIES'] = FILE_LIST_CACHE_MAX_ENTRIES
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'file_lists': FILE_LIST_CACHE,
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -154,6 +201,8 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_THROTTLE_RATES': {
         'user': '10/minute',
+        'file_table': '120/minute',  # DataTables requests a page per search keystroke
+        'file_search': '120/minute',
     },
     'UNAUTHENTICATED_USER': None,
 }
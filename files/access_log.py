@@ -0,0 +1,139 @@
+import os
+import atexit
+import logging
+import threading
+
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import FileAccessLog
+
+
+logger = logging.getLogger(__name__)
+
+
+class AccessLogWriter:
+    """
+    Buffer FileAccessLog rows in memory and write them with bulk_create from a background thread.
+
+    A flush happens every ``ACCESS_LOG_FLUSH_INTERVAL`` seconds, as soon as
+    ``ACCESS_LOG_BATCH_SIZE`` rows are waiting, and at interpreter exit. If more
+    than ``ACCESS_LOG_MAX_PENDING`` rows pile up, for example while the database
+    is down, new rows are written synchronously instead. With
+    ``ACCESS_LOG_BUFFERED`` off every row is written immediately, as tests need.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._pid = os.getpid()
+        self.written = 0
+
+    def record(self, file, user, access_type):
+        entry = self._build(file, user, access_type)
+        if self._should_buffer():
+            self._append(entry)
+        else:
+            entry.save()
+
+    async def arecord(self, file, user, access_type):
+        entry = self._build(file, user, access_type)
+        if self._should_buffer():
+            # Appending to the buffer touches no database, so it is safe on the event loop.
+            self._append(entry)
+        else:
+            await sync_to_async(entry.save)()
+
+    def _build(self, file, user, access_type):
+        return FileAccessLog(file=file, user=user, access_type=access_type, access_timestamp=timezone.now())
+
+    def _should_buffer(self):
+        return (
+            settings.ACCESS_LOG_BUFFERED
+            and not self._stopping
+            and len(self._pending) < settings.ACCESS_LOG_MAX_PENDING
+        )
+
+    def _append(self, entry):
+        self._ensure_thread()
+        self._pending.append(entry)
+        if len(self._pending) >= settings.ACCESS_LOG_BATCH_SIZE:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write every buffered row now, in the calling thread."""
+        with self._lock:
+            while self._pending:
+                batch = []
+                while self._pending and len(batch) < settings.ACCESS_LOG_BATCH_SIZE:
+                    batch.append(self._pending.popleft())
+                try:
+                    FileAccessLog.objects.bulk_create(batch)
+                    self.written += len(batch)
+                except IntegrityError:
+                    # One row whose file or user was deleted since it was recorded fails the whole batch.
+                    self._write_each(batch)
+                except Exception as e:
+                    logger.error(f"Failed to write {len(batch)} access log entries: {str(e)}")
+
+    def _write_each(self, batch):
+        """Write a batch row by row, dropping only the rows the database rejects."""
+        dropped = 0
+        for entry in batch:
+            try:
+                with transaction.atomic():
+                    entry.save(force_insert=True)
+                self.written += 1
+            except IntegrityError:
+                dropped += 1
+            except Exception as e:
+                logger.error(f"Failed to write an access log entry: {str(e)}")
+        if dropped:
+            logger.warning(f"Dropped {dropped} access log entries for deleted files or users")
+
+    def close(self):
+        """Stop the background thread and write what is left."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _ensure_thread(self):
+        if self._pid != os.getpid():
+            self._after_fork()
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='access-log-writer', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(settings.ACCESS_LOG_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+    def _after_fork(self):
+        # Rows buffered by the parent are the parent's to write, and its thread did not survive the fork.
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = os.getpid()
+
+
+access_log = AccessLogWriter()
+
+atexit.register(access_log.close)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=access_log._after_fork)
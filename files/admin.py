@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import File, FileAccessLog
+from .models import Blob, File, FileAccessLog, FileAccessRollup
 
 @admin.register(File)
 class FileAdmin(admin.ModelAdmin):
@@ -12,3 +12,14 @@ class FileAccessLogAdmin(admin.ModelAdmin):
     list_display = ('file', 'user', 'access_timestamp', 'access_type')
     search_fields = ('file__filename', 'user__username')
     list_filter = ('access_type', 'access_timestamp')
+
+@admin.register(FileAccessRollup)
+class FileAccessRollupAdmin(admin.ModelAdmin):
+    list_display = ('file', 'user', 'day', 'access_type', 'count')
+    search_fields = ('file__filename', 'user__username')
+    list_filter = ('access_type', 'day')
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'codec', 'stored_size', 'ref_count', 'created_at', 'last_referenced')
+    search_fields = ('sha256',)
@@ -0,0 +1,93 @@
+from asgiref.sync import sync_to_async
+
+from .storage import get_s3_client
+
+
+class ThreadedStreamingBody:
+    """Async view of a botocore StreamingBody whose blocking reads run in worker threads."""
+
+    def __init__(self, body):
+        self._body = body
+
+    async def read(self, amt=None):
+        return await sync_to_async(self._body.read, thread_sensitive=False)(amt)
+
+    async def iter_chunks(self, chunk_size=1024):
+        while True:
+            chunk = await self.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def close(self):
+        self._body.close()
+
+
+class ThreadedS3Client:
+    """
+    Async facade over the shared boto3 client, the S3 client of the async views.
+
+    Each call runs in a worker thread, so the event loop is never blocked, but
+    every in-flight call still holds a thread. Calls share the pooled
+    connections of the process's boto3 client.
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        async def call(**kwargs):
+            response = await sync_to_async(method, thread_sensitive=False)(**kwargs)
+            if isinstance(response, dict) and 'Body' in response:
+                response['Body'] = ThreadedStreamingBody(response['Body'])
+            return response
+
+        return call
+
+
+def get_async_s3_client():
+    """Return an async facade over this process's shared S3 client."""
+    return ThreadedS3Client(get_s3_client())
+
+
+async def upload_fileobj(s3_client, fileobj, bucket, key, part_size, extra_args):
+    """
+    Upload a file object, with a single put if it fits in one part and a multipart upload otherwise.
+
+    Reads run in worker threads; returns the number of bytes written.
+    """
+    read = sync_to_async(fileobj.read, thread_sensitive=False)
+    part = await read(part_size)
+    next_part = await read(part_size) if len(part) == part_size else b''
+    if not next_part:
+        await s3_client.put_object(Bucket=bucket, Key=key, Body=part, **extra_args)
+        return len(part)
+
+    response = await s3_client.create_multipart_upload(Bucket=bucket, Key=key, **extra_args)
+    upload_id = response['UploadId']
+    parts = []
+    written = 0
+    try:
+        while part:
+            response = await s3_client.upload_part(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=len(parts) + 1,
+                Body=part
+            )
+            parts.append({"ETag": response['ETag'], "PartNumber": len(parts) + 1})
+            written += len(part)
+            part, next_part = next_part, (await read(part_size) if next_part else b'')
+        await s3_client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts}
+        )
+    except Exception:
+        await s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        raise
+    return written
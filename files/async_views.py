@@ -0,0 +1,417 @@
+import json
+import math
+import uuid
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from rest_framework.authentication import CSRFCheck
+from rest_framework.throttling import UserRateThrottle
+
+from botocore.exceptions import ClientError
+from urllib.parse import unquote
+
+from .access_log import access_log
+from .async_storage import get_async_s3_client, upload_fileobj
+from .blobs import acquire_blob, register_blob, release_blob
+from .compression import CompressingReader, accepts_encoding, decompress, get_decompressor
+from .content_cache import content_cache
+from .line_index import get_line_range, split_lines
+from .models import File
+from .pagination import InvalidCursor
+from .ranges import content_range, parse_range_header
+from .storage import (
+    get_blob_key, get_line_index_key, get_object_codec, get_object_key, get_presigned_download_url
+)
+from .upload_handlers import MaxSizeUploadHandler, S3UploadedFile
+from .views import (
+    AWS_BUCKET_NAME, DOWNLOAD_CHUNK_SIZE, FILE_CONTENT_MAX_LINES, FILE_DOWNLOAD_MODE, FILE_LIST_MAX_PAGE_SIZE,
+    FILE_LIST_PAGE_SIZE, FILE_STORAGE_CODEC, FILE_UPLOAD_MAX_SIZE, S3_MULTIPART_PART_SIZE, FileUploadAPI,
+    conditional_response, format_size, get_encryption_args, get_file_etag, get_file_list_page, get_last_modified,
+    get_page_size, handle_file_not_found, if_range_matches, make_available, set_validators
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+async def stream_async_object(body, codec=''):
+    """Yield an S3 object's content in fixed-size chunks without blocking the event loop."""
+    decompressor = get_decompressor(codec) if codec else None
+    try:
+        async for chunk in body.iter_chunks(DOWNLOAD_CHUNK_SIZE):
+            if decompressor:
+                chunk = decompressor.decompress(chunk)
+            if chunk:
+                yield chunk
+        if decompressor:
+            tail = decompressor.flush()
+            if tail:
+                yield tail
+    finally:
+        body.close()
+
+
+async def iter_async_chunks(*chunks):
+    """Yield already-read bytes, so cached content streams like content read from S3."""
+    for chunk in chunks:
+        yield chunk
+
+
+async def read_async_object(s3_client, key, etag):
+    """Return an object's stored bytes from the content cache, fetching and caching them on a miss."""
+    data = content_cache.get(key, etag)
+    if data is None:
+        body = (await s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=key))['Body']
+        try:
+            data = await body.read()
+        finally:
+            body.close()
+        content_cache.set(key, etag, data)
+    return data
+
+
+class AsyncAPIView(View):
+    """
+    Base class for the async file API: session authentication and user throttling, like the DRF views.
+
+    Only the ORM calls that have no async form and CPU-bound work run in threads.
+    """
+    throttle_classes = [UserRateThrottle]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # The CSRF check reads the body, so like DRF it runs in dispatch, after initial().
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def initial(self, request):
+        """Prepare the request before anything reads its body."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.initial(request)
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=403)
+        # Replaces the lazy user, which would query the database synchronously.
+        request.user = user
+
+        check = CSRFCheck(lambda request: None)
+        check.process_request(request)
+        reason = await sync_to_async(check.process_view)(request, None, (), {})
+        if reason:
+            return JsonResponse({"detail": f"CSRF Failed: {reason}"}, status=403)
+
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            if not await sync_to_async(throttle.allow_request)(request, self):
+                response = JsonResponse({"detail": "Request was throttled."}, status=429)
+                wait = throttle.wait()
+                if wait is not None:
+                    response['Retry-After'] = str(math.ceil(wait))
+                return response
+
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncFileUploadView(AsyncAPIView):
+    """Async variant of FileUploadAPI: same validation and blob storage, with non-blocking S3 writes."""
+
+    def initial(self, request):
+        # Oversized files are dropped while the body is parsed instead of being copied whole first.
+        self.upload_handler = MaxSizeUploadHandler(request, max_size=FILE_UPLOAD_MAX_SIZE)
+        request.upload_handlers.insert(0, self.upload_handler)
+
+    async def post(self, request, *args, **kwargs):
+        # ASGI has already spooled the body; parsing it is local work.
+        uploaded = await sync_to_async(lambda: request.FILES.get('file'))()
+        if self.upload_handler.oversized_files:
+            return JsonResponse({"error": f"File size exceeds {format_size(FILE_UPLOAD_MAX_SIZE)} limit."}, status=400)
+        if uploaded is None:
+            return JsonResponse({"file": ["No file was submitted."]}, status=400)
+
+        uploads = FileUploadAPI()
+        uploaded_file = S3UploadedFile(
+            file=uploaded.file,
+            name=uploaded.name,
+            content_type=uploaded.content_type,
+            size=uploaded.size,
+            charset=uploaded.charset
+        )
+        # Hashes, validates and line-indexes the content in one pass.
+        error = await sync_to_async(uploads.validate_file, thread_sensitive=False)(uploaded_file)
+        if error:
+            return JsonResponse({"error": error}, status=400)
+
+        file_record = await sync_to_async(uploads.reserve_file)(request.user, uploaded_file)
+        if file_record is None:
+            logger.error(f"Failed to reserve a unique filename for {uploaded_file.name}")
+            return JsonResponse({"error": "File upload failed due to server error."}, status=500)
+
+        s3_client = get_async_s3_client()
+        try:
+            blob = await self.store_blob(s3_client, uploaded_file)
+        except ClientError as e:
+            logger.error(f"Failed to upload file: {str(e)}")
+            await file_record.adelete()
+            return JsonResponse({"error": "File upload failed due to server error."}, status=500)
+
+        if not await sync_to_async(make_available)(file_record, blob):
+            logger.error(f"Pending upload {file_record.pk} was reaped before completion")
+            await sync_to_async(release_blob)(blob.pk)
+            return JsonResponse({"error": "File upload failed due to server error."}, status=500)
+
+        return JsonResponse({"status": "File uploaded successfully"}, status=201)
+
+    async def store_blob(self, s3_client, uploaded_file):
+        blob = await sync_to_async(acquire_blob)(uploaded_file.sha256)
+        if blob is None:
+            blob_fields = await self.write_blob(s3_client, uploaded_file, get_blob_key(uploaded_file.sha256))
+            blob = await sync_to_async(register_blob)(uploaded_file.sha256, uploaded_file.size, **blob_fields)
+        return blob
+
+    async def write_blob(self, s3_client, uploaded_file, blob_key):
+        content_cache.invalidate(blob_key)
+        extra_args = {"ContentType": "text/plain", **get_encryption_args()}
+        uploaded_file.seek(0)
+        source = uploaded_file.file
+        if FILE_STORAGE_CODEC:
+            extra_args["ContentEncoding"] = FILE_STORAGE_CODEC
+            source = CompressingReader(source, FILE_STORAGE_CODEC)
+        stored_size = await upload_fileobj(s3_client, source, AWS_BUCKET_NAME, blob_key, S3_MULTIPART_PART_SIZE, extra_args)
+
+        has_line_index = not FILE_STORAGE_CODEC and uploaded_file.line_index is not None
+        if has_line_index:
+            await s3_client.put_object(
+                Bucket=AWS_BUCKET_NAME,
+                Key=get_line_index_key(blob_key),
+                Body=json.dumps(uploaded_file.line_index).encode(),
+                ContentType="application/json",
+                **get_encryption_args()
+            )
+        return {"codec": FILE_STORAGE_CODEC, "stored_size": stored_size, "has_line_index": has_line_index}
+
+
+class AsyncFileDownloadView(AsyncAPIView):
+    """Async variant of FileDownloadAPI, including multipart/byteranges responses to several ranges."""
+
+    async def get(self, request, file_name, *args, **kwargs):
+        decoded_filename = unquote(file_name)
+        try:
+            file_record = await File.objects.available().select_related('blob').aget(filename=decoded_filename, user=request.user)
+        except File.DoesNotExist:
+            return handle_file_not_found()
+
+        key = get_object_key(file_record)
+        codec = get_object_codec(file_record)
+        content_encoding = codec if codec and accepts_encoding(request, codec) else None
+        etag = get_file_etag(file_record, content_encoding)
+        last_modified = get_last_modified(file_record)
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            if codec:
+                patch_vary_headers(not_modified, ('Accept-Encoding',))
+            return not_modified
+
+        if FILE_DOWNLOAD_MODE == 'redirect' and (not codec or content_encoding):
+            await access_log.arecord(file=file_record, user=request.user, access_type="download")
+            response = HttpResponseRedirect(await sync_to_async(get_presigned_download_url)(key, decoded_filename))
+            if codec:
+                patch_vary_headers(response, ('Accept-Encoding',))
+            return response
+
+        ranges = None
+        if not codec and 'Range' in request.headers and if_range_matches(request, etag, last_modified):
+            ranges = parse_range_header(request.headers['Range'], file_record.file_size)
+        if ranges == []:
+            response = HttpResponse("Requested range not satisfiable.", status=416)
+            response['Content-Range'] = f"bytes */{file_record.file_size}"
+            return response
+
+        s3_client = get_async_s3_client()
+        try:
+            if ranges is None:
+                response = await self.full_response(s3_client, key, file_record, codec, content_encoding)
+            elif len(ranges) == 1:
+                response = await self.range_response(s3_client, key, file_record, *ranges[0])
+            else:
+                response = self.multipart_response(s3_client, key, file_record, ranges)
+        except ClientError as e:
+            logger.error(f"Failed to download file: {str(e)}")
+            return HttpResponse("Failed to retrieve file.", status=500)
+
+        await access_log.arecord(file=file_record, user=request.user, access_type="download")
+
+        response['Content-Disposition'] = f'attachment; filename="{decoded_filename}"'
+        response['Accept-Ranges'] = 'none' if codec else 'bytes'
+        return set_validators(response, etag, last_modified)
+
+    async def full_response(self, s3_client, key, file_record, codec, content_encoding):
+        # Small objects are served from, or added to, the content cache; larger ones are streamed.
+        etag = get_file_etag(file_record)
+        data = content_cache.get(key, etag)
+        if data is None:
+            file_object = await s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=key)
+            if file_object['ContentLength'] <= content_cache.max_item_bytes:
+                body = file_object['Body']
+                try:
+                    data = await body.read()
+                finally:
+                    body.close()
+                content_cache.set(key, etag, data)
+
+        if data is None:
+            stored_size = file_object['ContentLength']
+            chunks = stream_async_object(file_object['Body'], '' if content_encoding else codec)
+        else:
+            stored_size = len(data)
+            chunks = iter_async_chunks(data if content_encoding or not codec else decompress(data, codec))
+
+        response = StreamingHttpResponse(chunks, content_type='text/plain')
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+            response['Content-Length'] = stored_size
+        else:
+            response['Content-Length'] = file_record.file_size
+        if codec:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    async def range_response(self, s3_client, key, file_record, start, end):
+        file_object = await s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=key, Range=f"bytes={start}-{end}")
+        response = StreamingHttpResponse(stream_async_object(file_object['Body']), status=206, content_type='text/plain')
+        response['Content-Range'] = content_range(start, end, file_record.file_size)
+        response['Content-Length'] = end - start + 1
+        return response
+
+    def multipart_response(self, s3_client, key, file_record, ranges):
+        boundary = uuid.uuid4().hex
+        part_headers = [
+            (
+                f"--{boundary}\r\n"
+                f"Content-Type: text/plain\r\n"
+                f"Content-Range: {content_range(start, end, file_record.file_size)}\r\n\r\n"
+            ).encode()
+            for start, end in ranges
+        ]
+        closing = f"--{boundary}--\r\n".encode()
+
+        async def stream_parts():
+            # Each part is its own ranged GET, issued only when the client gets to it.
+            for part_header, (start, end) in zip(part_headers, ranges):
+                yield part_header
+                try:
+                    file_object = await s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=key, Range=f"bytes={start}-{end}")
+                except ClientError as e:
+                    logger.error(f"Failed to download file range: {str(e)}")
+                    return
+                async for chunk in stream_async_object(file_object['Body']):
+                    yield chunk
+                yield b"\r\n"
+            yield closing
+
+        response = StreamingHttpResponse(
+            stream_parts(),
+            status=206,
+            content_type=f"multipart/byteranges; boundary={boundary}"
+        )
+        response['Content-Length'] = sum(
+            len(part_header) + end - start + 1 + 2 for part_header, (start, end) in zip(part_headers, ranges)
+        ) + len(closing)
+        return response
+
+
+class AsyncFileContentView(AsyncAPIView):
+    """Async variant of FileContentAPI, including ``offset``/``limit`` line pages."""
+
+    async def get(self, request, file_name, *args, **kwargs):
+        decoded_filename = unquote(file_name)
+        paginate = 'offset' in request.GET or 'limit' in request.GET
+        if paginate:
+            try:
+                offset = int(request.GET.get('offset', 0))
+                limit = int(request.GET.get('limit', FILE_CONTENT_MAX_LINES))
+            except ValueError:
+                return JsonResponse({"error": "offset and limit must be integers."}, status=400)
+            if offset < 0 or not 1 <= limit <= FILE_CONTENT_MAX_LINES:
+                return JsonResponse({"error": f"offset must not be negative and limit must be between 1 and {FILE_CONTENT_MAX_LINES}."}, status=400)
+
+        try:
+            file_record = await File.objects.available().select_related('blob').aget(filename=decoded_filename, user=request.user)
+        except File.DoesNotExist:
+            return handle_file_not_found()
+
+        etag = get_file_etag(file_record)
+        last_modified = get_last_modified(file_record)
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        s3_client = get_async_s3_client()
+        key = get_object_key(file_record)
+        try:
+            if paginate:
+                lines, total_lines = await self.read_lines(s3_client, file_record, key, etag, offset, limit)
+                next_offset = offset + len(lines)
+                data = {
+                    "file_name": decoded_filename,
+                    "content": b''.join(lines).decode('utf-8'),
+                    "offset": offset,
+                    "limit": limit,
+                    "total_lines": total_lines,
+                    "next_offset": next_offset if next_offset < total_lines else None,
+                }
+            else:
+                stored_content = await read_async_object(s3_client, key, etag)
+                data = {"file_name": decoded_filename, "content": decompress(stored_content, get_object_codec(file_record)).decode('utf-8')}
+        except ClientError as e:
+            logger.error(f"Failed to retrieve file content: {str(e)}")
+            return JsonResponse({"error": "File retrieval failed."}, status=500)
+
+        await access_log.arecord(file=file_record, user=request.user, access_type="view")
+        return set_validators(JsonResponse(data), etag, last_modified)
+
+    async def read_lines(self, s3_client, file_record, key, etag, offset, limit):
+        if file_record.blob_id is None or not file_record.blob.has_line_index:
+            lines = split_lines(decompress(await read_async_object(s3_client, key, etag), get_object_codec(file_record)))
+            return lines[offset:offset + limit], len(lines)
+
+        index = json.loads(await read_async_object(s3_client, get_line_index_key(key), etag))
+        line_range = get_line_range(index, offset, limit)
+        if line_range is None:
+            return [], index["lines"]
+
+        start, end, skip = line_range
+        cached = content_cache.get(key, etag)
+        if cached is not None:
+            data = cached[start:end]
+        else:
+            body = (await s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=key, Range=f"bytes={start}-{end - 1}"))['Body']
+            try:
+                data = await body.read()
+            finally:
+                body.close()
+        return split_lines(data)[skip:skip + limit], index["lines"]
+
+
+class AsyncFileListView(AsyncAPIView):
+    """Async variant of FileListAPI."""
+
+    async def get(self, request, *args, **kwargs):
+        limit = get_page_size(request.GET, FILE_LIST_PAGE_SIZE, FILE_LIST_MAX_PAGE_SIZE)
+        if limit is None:
+            return JsonResponse({"error": f"limit must be an integer between 1 and {FILE_LIST_MAX_PAGE_SIZE}."}, status=400)
+
+        try:
+            files, next_cursor, etag = await sync_to_async(get_file_list_page)(request.user, request.GET.get('cursor'), limit)
+        except InvalidCursor:
+            return JsonResponse({"error": "Invalid cursor."}, status=400)
+
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        return set_validators(JsonResponse({"files": files, "next_cursor": next_cursor}), etag)
@@ -0,0 +1,39 @@
+import hashlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Blob
+
+
+def compute_sha256(uploaded_file):
+    """Hash an uploaded file's content, leaving it positioned at the start."""
+    hasher = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        hasher.update(chunk)
+    uploaded_file.seek(0)
+    return hasher.hexdigest()
+
+
+def acquire_blob(sha256):
+    """Take a reference on stored content, or return None if nothing with this digest is stored yet."""
+    if Blob.objects.filter(sha256=sha256).update(ref_count=F('ref_count') + 1, last_referenced=timezone.now()):
+        return Blob.objects.get(sha256=sha256)
+    return None
+
+
+def register_blob(sha256, size, **fields):
+    """Record content that was just written to its blob key and take a reference on it."""
+    try:
+        with transaction.atomic():
+            return Blob.objects.create(sha256=sha256, size=size, ref_count=1, **fields)
+    except IntegrityError:
+        # A concurrent upload of the same content registered it first.
+        return acquire_blob(sha256) or register_blob(sha256, size, **fields)
+
+
+def release_blob(blob_id):
+    """Drop a reference; blobs nobody references are deleted later by the gc_blobs command."""
+    # The grace period runs from when a blob lost its last reference, not from when it was last taken.
+    Blob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') - 1, last_referenced=timezone.now())
@@ -0,0 +1,103 @@
+import zlib
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+
+CODEC_IDENTITY = ''
+CODEC_GZIP = 'gzip'
+CODEC_ZSTD = 'zstd'
+CODECS = (CODEC_IDENTITY, CODEC_GZIP, CODEC_ZSTD)
+
+
+def check_codec(codec):
+    if codec not in CODECS:
+        raise ImproperlyConfigured(f"Unknown storage codec {codec!r}, expected one of {CODECS}.")
+    if codec == CODEC_ZSTD and zstandard is None:
+        raise ImproperlyConfigured("The zstd storage codec requires the zstandard package.")
+
+
+def get_compressor(codec):
+    """Return a streaming compressor with ``compress(data)`` and ``flush()``."""
+    check_codec(codec)
+    if codec == CODEC_GZIP:
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor().compressobj()
+    return None
+
+
+def get_decompressor(codec):
+    """Return a streaming decompressor with ``decompress(data)``."""
+    check_codec(codec)
+    if codec == CODEC_GZIP:
+        return zlib.decompressobj(31)
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdDecompressor().decompressobj()
+    return None
+
+
+def decompress(data, codec):
+    decompressor = get_decompressor(codec)
+    if decompressor is None:
+        return data
+    return decompressor.decompress(data)
+
+
+def iter_decompressed(chunks, codec):
+    """Decompress a stream of chunks as it is read."""
+    decompressor = get_decompressor(codec)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    data = decompressor.flush()
+    if data:
+        yield data
+
+
+def accepts_encoding(request, codec):
+    """Whether the client's Accept-Encoding lets us send ``codec`` bytes as they are stored."""
+    for coding in request.headers.get('Accept-Encoding', '').split(','):
+        name, _, params = coding.strip().partition(';')
+        if name.strip().lower() in (codec, '*') and params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            return True
+    return False
+
+
+class CompressingReader:
+    """Read-only file wrapper that yields the compressed form of another file's content."""
+
+    def __init__(self, file, codec, chunk_size=64 * 1024):
+        self.file = file
+        self.compressor = get_compressor(codec)
+        self.chunk_size = chunk_size
+        self.pending = b''
+        self.finished = False
+        self.position = 0
+
+    def read(self, size=-1):
+        while not self.finished and (size < 0 or len(self.pending) < size):
+            chunk = self.file.read(self.chunk_size)
+            if chunk:
+                self.pending += self.compressor.compress(chunk)
+            else:
+                self.pending += self.compressor.flush()
+                self.finished = True
+
+        if size < 0:
+            data, self.pending = self.pending, b''
+        else:
+            data, self.pending = self.pending[:size], self.pending[size:]
+        self.position += len(data)
+        return data
+
+    def tell(self):
+        return self.position
+
+    def seekable(self):
+        return False
@@ -0,0 +1,90 @@
+import os
+import threading
+
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class ContentCache:
+    """
+    Process-local LRU cache of S3 object bytes, bounded by a byte budget.
+
+    Entries are keyed by S3 key and ETag, so a stale entry can never be served
+    for new content; writes to a key still invalidate it to free the memory.
+    Objects larger than ``max_item_bytes`` are never cached.
+    """
+
+    def __init__(self, max_bytes=None, max_item_bytes=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._max_bytes = max_bytes
+        self._max_item_bytes = max_item_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self):
+        return settings.CONTENT_CACHE_MAX_BYTES if self._max_bytes is None else self._max_bytes
+
+    @property
+    def max_item_bytes(self):
+        limit = settings.CONTENT_CACHE_MAX_ITEM_BYTES if self._max_item_bytes is None else self._max_item_bytes
+        return min(limit, self.max_bytes)
+
+    def get(self, key, etag):
+        with self._lock:
+            data = self._entries.get((key, etag))
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((key, etag))
+            self.hits += 1
+            return data
+
+    def set(self, key, etag, data):
+        if len(data) > self.max_item_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop((key, etag), None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[(key, etag)] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Drop every cached version of an S3 key."""
+        with self._lock:
+            for entry in [entry for entry in self._entries if entry[0] == key]:
+                self.size -= len(self._entries.pop(entry))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _after_fork(self):
+        # The parent's lock may have been held at fork time, so replace it.
+        self._lock = threading.Lock()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+content_cache = ContentCache()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=content_cache._after_fork)
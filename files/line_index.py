@@ -0,0 +1,66 @@
+class LineIndexBuilder:
+    """
+    Build a sparse line index of a text stream as it is read.
+
+    The index records the byte offset of every ``stride``-th line, so any line
+    range maps onto a single byte range that starts at most ``stride`` lines
+    early.
+    """
+
+    def __init__(self, stride):
+        self.stride = stride
+        self.offsets = [0]
+        self.newlines = 0
+        self.size = 0
+        self.ends_with_newline = False
+
+    def feed(self, data):
+        count = data.count(b'\n')
+        # Newlines still to pass before the next indexed line starts.
+        remaining = self.stride - self.newlines % self.stride
+        position = -1
+        left = count
+        while left >= remaining:
+            for _ in range(remaining):
+                position = data.index(b'\n', position + 1)
+            self.offsets.append(self.size + position + 1)
+            left -= remaining
+            remaining = self.stride
+
+        self.newlines += count
+        self.size += len(data)
+        if data:
+            self.ends_with_newline = data.endswith(b'\n')
+
+    def finish(self):
+        lines = self.newlines if self.ends_with_newline or not self.size else self.newlines + 1
+        return {
+            "stride": self.stride,
+            "lines": lines,
+            "size": self.size,
+            # A trailing newline would otherwise index a line that does not exist.
+            "offsets": [offset for offset in self.offsets if offset < self.size],
+        }
+
+
+def get_line_range(index, offset, limit):
+    """
+    Map lines ``offset`` to ``offset + limit`` onto the indexed file.
+
+    Returns ``(start, end, skip)``: the byte range to read, end exclusive, and how
+    many lines at its start precede ``offset``. Returns None past the last line.
+    """
+    if offset >= index["lines"]:
+        return None
+    stride = index["stride"]
+    offsets = index["offsets"]
+    first_block = offset // stride
+    last_block = -(-min(offset + limit, index["lines"]) // stride)
+    end = offsets[last_block] if last_block < len(offsets) else index["size"]
+    return offsets[first_block], end, offset - first_block * stride
+
+
+def split_lines(data):
+    """Split bytes into lines on ``\\n`` only, keeping the line endings."""
+    lines = data.split(b'\n')
+    return [line + b'\n' for line in lines[:-1]] + ([lines[-1]] if lines[-1] else [])
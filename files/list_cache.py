@@ -0,0 +1,82 @@
+import hashlib
+import threading
+
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import FileListVersion
+
+
+class FileListCache:
+    """
+    Cache of users' file listings, keyed by a per-user version number.
+
+    Every change to a user's list of available files bumps the version in
+    FileListVersion, in the transaction that makes the change. Listings are
+    cached under the version they were built from, so after a bump the old
+    entries are never read again and age out of the bounded cache. The current
+    version is itself cached, so a repeated listing needs no query at all.
+    """
+
+    def __init__(self, alias='file_lists'):
+        self.alias = alias
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_version_key(self, user_id):
+        return f"files:list-version:{user_id}"
+
+    def get_version(self, user_id):
+        key = self.get_version_key(user_id)
+        version = self.cache.get(key)
+        if version is None:
+            version = FileListVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first() or 0
+            # add, not set: a bump that committed since the read has already stored a newer version.
+            self.cache.add(key, version)
+        return version
+
+    def bump(self, user_id):
+        """Invalidate a user's cached listings; call it in the transaction that changes their files."""
+        with transaction.atomic():
+            if not FileListVersion.objects.filter(user_id=user_id).update(version=F('version') + 1):
+                try:
+                    with transaction.atomic():
+                        FileListVersion.objects.create(user_id=user_id, version=1)
+                except IntegrityError:
+                    FileListVersion.objects.filter(user_id=user_id).update(version=F('version') + 1)
+            version = FileListVersion.objects.filter(user_id=user_id).values_list('version', flat=True).get()
+        # Until the change commits, other requests must keep reading the old version.
+        transaction.on_commit(lambda: self.cache.set(self.get_version_key(user_id), version))
+
+    def get(self, user_id, name, build):
+        """Return a user's listing ``name``, calling ``build()`` and caching its result on a miss."""
+        name = f"{name}:{timezone.get_current_timezone_name()}"
+        key = f"files:list:{user_id}:{self.get_version(user_id)}:{hashlib.sha256(name.encode()).hexdigest()}"
+        value = self.cache.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if value is None:
+            value = build()
+            self.cache.set(key, value)
+        return value
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+
+file_list_cache = FileListCache()
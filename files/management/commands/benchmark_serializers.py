@@ -0,0 +1,71 @@
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from files.models import File
+from files.renderers import FastJSONRenderer, orjson
+from files.serializers import FileSerializer, serialize_rows
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare FileSerializer with the values() fast path used by the file list, from query to JSON bytes. "
+        "Rows are inserted in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3, help="Report the best of this many runs.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"orjson: {'yes' if orjson is not None else 'no'}")
+        for count in options['rows']:
+            try:
+                with transaction.atomic():
+                    self.benchmark(count, options['repeat'])
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def benchmark(self, count, repeat):
+        user = User.objects.create_user(username=f"benchmark-{uuid.uuid4().hex}")
+        File.objects.bulk_create(
+            [
+                File(user=user, filename=f"file-{i}.txt", file_url=f"https://example.com/file-{i}.txt", file_size=1024)
+                for i in range(count)
+            ],
+            batch_size=5000
+        )
+        files = File.objects.available().filter(user=user).order_by('-upload_timestamp', '-id')
+
+        def model_serializer():
+            return JSONRenderer().render(FileSerializer(list(files), many=True).data)
+
+        def fast_path():
+            return FastJSONRenderer().render(serialize_rows(FileSerializer, list(files.values(*FileSerializer.Meta.fields))))
+
+        if model_serializer() != fast_path():
+            raise CommandError(f"Outputs differ at {count} rows.")
+
+        slow = self.best_of(model_serializer, repeat)
+        fast = self.best_of(fast_path, repeat)
+        self.stdout.write(
+            f"{count:>8} rows: FileSerializer {slow * 1000:9.1f} ms, "
+            f"fast path {fast * 1000:9.1f} ms, {slow / fast:5.1f}x faster"
+        )
+
+    def best_of(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
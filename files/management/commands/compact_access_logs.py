@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from files.models import FileAccessLog, FileAccessRollup
+
+
+COMPACT_BATCH_ATTEMPTS = 3
+
+
+class Command(BaseCommand):
+    help = "Roll access log rows older than the retention window up into per-day counts and delete them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=settings.ACCESS_LOG_RETENTION_DAYS,
+            help="Keep raw access log rows for this many days, counting today."
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.ACCESS_LOG_COMPACT_BATCH_SIZE,
+            help="Roll up and delete at most this many rows per transaction."
+        )
+
+    def handle(self, *args, **options):
+        # Compacting whole days only means a day is either all raw rows or all rollups.
+        today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        cutoff = today - timedelta(days=options['retention_days'] - 1)
+        compacted = 0
+
+        while True:
+            count = self.compact_batch_with_retry(cutoff, options['batch_size'])
+            if not count:
+                break
+            compacted += count
+
+        self.stdout.write(f"Compacted {compacted} access log entries.")
+
+    def compact_batch_with_retry(self, cutoff, batch_size):
+        # Two overlapping runs can both create the rollup for the same key; the
+        # loser's transaction rolls back whole, and on retry it finds the
+        # winner's rollup and adds to it.
+        for attempt in range(COMPACT_BATCH_ATTEMPTS):
+            try:
+                return self.compact_batch(cutoff, batch_size)
+            except (IntegrityError, OperationalError):  # duplicate rollup, or an InnoDB deadlock
+                if attempt == COMPACT_BATCH_ATTEMPTS - 1:
+                    raise
+
+    def compact_batch(self, cutoff, batch_size):
+        with transaction.atomic():
+            # Skipping locked rows keeps overlapping runs from counting a raw row twice.
+            ids = list(
+                FileAccessLog.objects.select_for_update(skip_locked=True)
+                .filter(access_timestamp__lt=cutoff)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return 0
+
+            totals = (
+                FileAccessLog.objects.filter(pk__in=ids)
+                .annotate(day=TruncDate('access_timestamp'))
+                .values('file_id', 'user_id', 'day', 'access_type')
+                .annotate(count=Count('pk'))
+                .order_by()
+            )
+            counts = {
+                (row['file_id'], row['user_id'], row['day'], row['access_type']): row['count']
+                for row in totals
+            }
+
+            existing = FileAccessRollup.objects.select_for_update().filter(
+                file_id__in={key[0] for key in counts},
+                day__in={key[2] for key in counts},
+            )
+            updated = []
+            for rollup in existing:
+                key = (rollup.file_id, rollup.user_id, rollup.day, rollup.access_type)
+                if key in counts:
+                    rollup.count += counts.pop(key)
+                    updated.append(rollup)
+            FileAccessRollup.objects.bulk_update(updated, ['count'])
+            FileAccessRollup.objects.bulk_create([
+                FileAccessRollup(file_id=file_id, user_id=user_id, day=day, access_type=access_type, count=count)
+                for (file_id, user_id, day, access_type), count in counts.items()
+            ])
+
+            FileAccessLog.objects.filter(pk__in=ids).delete()
+        return len(ids)
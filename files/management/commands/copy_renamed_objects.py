@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from files.models import File
+from files.storage import get_file_key, get_object_url, get_s3_client
+from files.views import get_encryption_args
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the S3 objects of files renamed by the unique filename migration to the keys of their new names. "
+        "Safe to run again."
+    )
+
+    def handle(self, *args, **options):
+        s3_client = get_s3_client()
+        url_prefix = get_object_url('')
+        copied = 0
+
+        # Files stored under their name whose URL still points at an old name's key.
+        legacy_files = File.objects.filter(blob__isnull=True, file_url__startswith=url_prefix).only(
+            'id', 'user_id', 'filename', 'file_url'
+        )
+        for file_record in legacy_files.iterator():
+            key = get_file_key(file_record.user_id, file_record.filename)
+            if file_record.file_url == get_object_url(key):
+                continue
+            s3_client.copy_object(
+                Bucket=settings.AWS_BUCKET_NAME,
+                Key=key,
+                CopySource={'Bucket': settings.AWS_BUCKET_NAME, 'Key': file_record.file_url[len(url_prefix):]},
+                **get_encryption_args()
+            )
+            File.objects.filter(pk=file_record.pk).update(file_url=get_object_url(key))
+            copied += 1
+
+        self.stdout.write(f"Copied {copied} renamed objects.")
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from files.models import UploadSession
+from files.storage import get_upload_session_path
+
+
+class Command(BaseCommand):
+    help = "Delete resumable upload sessions, and their staged bytes, that have been idle for too long."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=settings.UPLOAD_SESSION_EXPIRY,
+            help="Only expire sessions idle for more than this many seconds."
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['older_than'])
+        expired = 0
+        for upload_session in UploadSession.objects.filter(updated_at__lt=cutoff).iterator():
+            get_upload_session_path(upload_session.id).unlink(missing_ok=True)
+            upload_session.delete()
+            expired += 1
+
+        self.stdout.write(f"Expired {expired} upload sessions.")
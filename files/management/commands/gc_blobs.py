@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from files.models import Blob
+from files.storage import get_s3_client, get_blob_key, get_line_index_key
+
+
+class Command(BaseCommand):
+    help = "Delete content-addressed blobs that no File has referenced for the grace period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-period',
+            type=int,
+            default=settings.BLOB_GC_GRACE_PERIOD,
+            help="Only delete blobs unreferenced for more than this many seconds."
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['grace_period'])
+        s3_client = get_s3_client()
+        deleted = 0
+
+        candidates = Blob.objects.filter(ref_count__lte=0, last_referenced__lt=cutoff).values_list('pk', flat=True)
+        for blob_id in list(candidates):
+            # The row lock makes a concurrent upload of the same content wait, then
+            # find the row gone and write the content again instead of reusing it.
+            with transaction.atomic():
+                blob = Blob.objects.select_for_update().filter(pk=blob_id, ref_count__lte=0).first()
+                if blob is None or blob.files.exists():
+                    continue
+                blob_key = get_blob_key(blob.sha256)
+                s3_client.delete_object(Bucket=settings.AWS_BUCKET_NAME, Key=blob_key)
+                if blob.has_line_index:
+                    s3_client.delete_object(Bucket=settings.AWS_BUCKET_NAME, Key=get_line_index_key(blob_key))
+                blob.delete()
+                deleted += 1
+
+        self.stdout.write(f"Deleted {deleted} unreferenced blobs.")
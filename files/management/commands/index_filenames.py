@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from files.models import File
+from files.search import index_filenames
+
+
+class Command(BaseCommand):
+    help = "Build the filename trigram index for files uploaded before it existed. Safe to run again."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Index this many files per query."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        indexed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                File.objects.filter(id__gt=last_id, name_trigrams__isnull=True)
+                .order_by('id')
+                .only('id', 'user_id', 'filename')[:batch_size]
+            )
+            if not batch:
+                break
+            index_filenames(batch)
+            indexed += len(batch)
+            last_id = batch[-1].id
+
+        self.stdout.write(f"Indexed {indexed} file names.")
@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from files.models import File
+from files.storage import get_s3_client
+
+
+class Command(BaseCommand):
+    help = "Delete uploads that never completed: pending File rows, staged objects and multipart uploads."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=settings.PENDING_UPLOAD_TIMEOUT,
+            help="Only reap uploads started more than this many seconds ago."
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['older_than'])
+        s3_client = get_s3_client()
+
+        reaped_files = self.reap_pending_files(cutoff)
+        reaped_objects = self.reap_staged_objects(s3_client, cutoff)
+        reaped_uploads = self.reap_multipart_uploads(s3_client, cutoff)
+
+        self.stdout.write(
+            f"Reaped {reaped_files} pending files, {reaped_objects} staged objects "
+            f"and {reaped_uploads} multipart uploads."
+        )
+
+    def reap_pending_files(self, cutoff):
+        # Pending rows do not own any S3 object yet: their content becomes a blob
+        # only when the upload completes, and an upload still in flight drops
+        # its blob reference when it finds its row gone.
+        deleted, per_model = File.objects.pending().filter(upload_timestamp__lt=cutoff).delete()
+        return per_model.get(File._meta.label, 0)
+
+    def reap_staged_objects(self, s3_client, cutoff):
+        reaped = 0
+        paginator = s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=settings.AWS_BUCKET_NAME, Prefix=settings.S3_STAGING_PREFIX):
+            keys = [obj['Key'] for obj in page.get('Contents', []) if obj['LastModified'] < cutoff]
+            if keys:
+                s3_client.delete_objects(
+                    Bucket=settings.AWS_BUCKET_NAME,
+                    Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True}
+                )
+                reaped += len(keys)
+        return reaped
+
+    def reap_multipart_uploads(self, s3_client, cutoff):
+        reaped = 0
+        paginator = s3_client.get_paginator('list_multipart_uploads')
+        for page in paginator.paginate(Bucket=settings.AWS_BUCKET_NAME, Prefix=settings.S3_STAGING_PREFIX):
+            for upload in page.get('Uploads', []):
+                if upload['Initiated'] < cutoff:
+                    s3_client.abort_multipart_upload(
+                        Bucket=settings.AWS_BUCKET_NAME,
+                        Key=upload['Key'],
+                        UploadId=upload['UploadId']
+                    )
+                    reaped += 1
+        return reaped
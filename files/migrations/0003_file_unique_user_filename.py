@@ -0,0 +1,63 @@
+# Generated by Django 5.0 on 2026-10-18 09:12
+
+import os
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def rename_duplicate_filenames(apps, schema_editor):
+    """
+    Make names unique per user, as the database compares them, so the constraint can be added.
+
+    Grouping and lookups go through the database, so under MySQL names that
+    differ only in case or accents count as duplicates, as they will for the
+    constraint. Rows with exactly the same name share one S3 object, which holds
+    the latest upload, so only the newest row is kept and the others' access
+    logs move to it. Other duplicates are separate objects: all but the newest
+    get the lowest free " (n)" suffix. Their file_url still points at the old
+    object, which the copy_renamed_objects command copies to the new key.
+    """
+    File = apps.get_model('files', 'File')
+    FileAccessLog = apps.get_model('files', 'FileAccessLog')
+
+    duplicates = (
+        File.objects.values('user_id', 'filename')
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    for group in list(duplicates):
+        user_files = File.objects.filter(user_id=group['user_id'])
+        rows = user_files.filter(filename=group['filename']).order_by('-upload_timestamp', '-id')
+
+        kept = {}
+        for pk, filename in rows.values_list('id', 'filename'):  # newest first
+            if filename in kept:
+                FileAccessLog.objects.filter(file_id=pk).update(file_id=kept[filename])
+                File.objects.filter(pk=pk).delete()
+            else:
+                kept[filename] = pk
+
+        for filename, pk in list(kept.items())[1:]:
+            base, extension = os.path.splitext(filename)
+            counter = 1
+            while user_files.filter(filename=f"{base} ({counter}){extension}").exists():
+                counter += 1
+            File.objects.filter(pk=pk).update(filename=f"{base} ({counter}){extension}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0002_alter_fileaccesslog_access_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_filenames, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='file',
+            constraint=models.UniqueConstraint(fields=('user', 'filename'), name='unique_user_filename'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0 on 2026-10-18 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0003_file_unique_user_filename'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('available', 'Available')], default='available', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['status', 'upload_timestamp'], name='file_status_uploaded_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 20:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0007_blob_codec_blob_stored_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='has_line_index',
+            field=models.BooleanField(default=False),
+        ),
+    ]
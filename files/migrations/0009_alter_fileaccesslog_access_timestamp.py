@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-18 21:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0008_blob_has_line_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fileaccesslog',
+            name='access_timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-18 21:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0010_fileaccessrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fileaccesslog',
+            index=models.Index(fields=['file', 'access_timestamp'], name='access_log_file_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileaccesslog',
+            index=models.Index(fields=['user', 'access_timestamp'], name='access_log_user_time_idx'),
+        ),
+    ]
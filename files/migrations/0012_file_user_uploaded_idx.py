@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-18 21:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0011_fileaccesslog_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['user', 'upload_timestamp', 'id'], name='file_user_uploaded_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-18 21:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0013_filelistversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileNameTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='name_trigrams', to='files.file')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'trigram', 'file'], name='filename_trigram_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='filenametrigram',
+            constraint=models.UniqueConstraint(fields=('file', 'trigram'), name='unique_file_trigram'),
+        ),
+    ]
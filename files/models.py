@@ -1,23 +1,134 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
+class Blob(models.Model):
+    """Content-addressed S3 object shared by every File with the same bytes."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()  # in bytes, before compression
+    codec = models.CharField(max_length=10, blank=True, default='')  # '' when stored uncompressed
+    stored_size = models.BigIntegerField(null=True, blank=True)  # in bytes, as stored in S3
+    has_line_index = models.BooleanField(default=False)  # a sparse line index is stored next to the content
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_referenced = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.sha256
+
+
+class FileQuerySet(models.QuerySet):
+    def available(self):
+        """Files whose content has been written to S3."""
+        return self.filter(status=File.STATUS_AVAILABLE)
+
+    def pending(self):
+        return self.filter(status=File.STATUS_PENDING)
+
+
 class File(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_AVAILABLE = 'available'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_AVAILABLE, 'Available'),
+    )
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='files')
     filename = models.CharField(max_length=255)
     file_url = models.TextField()
     file_size = models.IntegerField()  # in bytes
     upload_timestamp = models.DateTimeField(auto_now_add=True)
     is_encrypted = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_AVAILABLE)
+    blob = models.ForeignKey(Blob, on_delete=models.PROTECT, related_name='files', null=True, blank=True)  # None for files stored per user before deduplication
+
+    objects = FileQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'filename'], name='unique_user_filename'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'upload_timestamp'], name='file_status_uploaded_idx'),
+            models.Index(fields=['user', 'upload_timestamp', 'id'], name='file_user_uploaded_idx'),
+        ]
 
     def __str__(self):
         return self.filename
     
 
+class FileNameTrigram(models.Model):
+    """One lowercased three-character substring of a File's name, for indexed substring search."""
+    file = models.ForeignKey(File, on_delete=models.CASCADE, related_name='name_trigrams')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')  # copied from the file, so lookups stay per user
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['file', 'trigram'], name='unique_file_trigram'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'trigram', 'file'], name='filename_trigram_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.file.filename} - {self.trigram}"
+
+
+class FileListVersion(models.Model):
+    """Counter bumped whenever a user's list of available files changes, versioning cached listings."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='file_list_version')
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.version}"
+
+
 class FileAccessLog(models.Model):
     file = models.ForeignKey(File, on_delete=models.CASCADE, related_name='access_logs')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='access_logs')
-    access_timestamp = models.DateTimeField(auto_now_add=True)
+    access_timestamp = models.DateTimeField(default=timezone.now)  # set when the access happens, not when the row is written
+    access_type = models.CharField(max_length=10)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['file', 'access_timestamp'], name='access_log_file_time_idx'),
+            models.Index(fields=['user', 'access_timestamp'], name='access_log_user_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.access_type} - {self.file.filename}"
+
+
+class FileAccessRollup(models.Model):
+    """Per-day access counts for FileAccessLog rows that have been compacted."""
+    file = models.ForeignKey(File, on_delete=models.CASCADE, related_name='access_rollups')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='access_rollups')
+    day = models.DateField()  # in TIME_ZONE
     access_type = models.CharField(max_length=10)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['file', 'user', 'day', 'access_type'], name='unique_access_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.access_type} - {self.file.filename} - {self.day}: {self.count}"
+
+
+class UploadSession(models.Model):
+    """A resumable upload whose bytes are staged on local disk until it is finalized."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()  # declared total, in bytes
+    offset = models.BigIntegerField(default=0)  # bytes received so far
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.user.username} - {self.access_type} - {self.file.filename}"
\ No newline at end of file
+        return f"{self.user.username} - {self.filename} ({self.offset}/{self.size})"
@@ -0,0 +1,57 @@
+import json
+import base64
+import binascii
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque, URL-safe cursor."""
+    values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, fields):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidCursor(cursor)
+    try:
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValidationError, TypeError):
+        raise InvalidCursor(cursor)
+
+
+def paginate_keyset(queryset, fields, cursor=None, limit=50):
+    """
+    Return one page of ``queryset`` in descending order of ``fields``, and the cursor of the next page.
+
+    Each page starts where the previous one ended instead of at an OFFSET, so
+    with an index ending in ``fields`` every page costs the same however deep it
+    is. Rows may be model instances or ``values()`` dicts. The last field must
+    be unique; the cursor is None on the last page.
+    Raises InvalidCursor for a cursor this function did not produce.
+    """
+    model_fields = [queryset.model._meta.get_field(name) for name in fields]
+    if cursor:
+        values = decode_cursor(cursor, model_fields)
+        after = Q()
+        for i, name in enumerate(fields):
+            after |= Q(**{f'{name}__lt': values[i]}, **dict(zip(fields[:i], values[:i])))
+        queryset = queryset.filter(after)
+
+    rows = list(queryset.order_by(*[f'-{name}' for name in fields])[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    if isinstance(last, dict):
+        return rows, encode_cursor([last[name] for name in fields])
+    return rows, encode_cursor([getattr(last, field.attname) for field in model_fields])
@@ -0,0 +1,51 @@
+MAX_RANGES = 16
+
+
+def parse_range_header(header, size):
+    """
+    Parse a ``Range: bytes=...`` header against a file of ``size`` bytes.
+
+    Returns the requested ``(start, end)`` byte ranges, inclusive, sorted and with
+    overlapping or adjacent ranges merged. Returns an empty list if none of them
+    is satisfiable, and None if the header should be ignored and the whole file
+    served: it is malformed, not in bytes, or asks for too many ranges.
+    """
+    units, _, specs = header.partition('=')
+    if units.strip().lower() != 'bytes':
+        return None
+
+    ranges = []
+    for spec in specs.split(','):
+        first, separator, last = spec.strip().partition('-')
+        # int() would also take signs, spaces and underscores, which a byte position may not have.
+        if not separator or not all(bound.isascii() and bound.isdigit() for bound in (first, last) if bound):
+            return None
+        if not first:
+            if not last:
+                return None
+            # A suffix range: the last N bytes.
+            length = int(last)
+            if length > 0 and size > 0:
+                ranges.append((max(size - length, 0), size - 1))
+            continue
+        start = int(first)
+        end = int(last) if last else None
+        if end is not None and end < start:
+            return None
+        if start < size:
+            ranges.append((start, size - 1 if end is None else min(end, size - 1)))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def content_range(start, end, size):
+    return f"bytes {start}-{end}/{size}"
@@ -0,0 +1,42 @@
+from django.db.models import Count
+
+from .models import FileNameTrigram
+
+
+def get_trigrams(text):
+    """Return the set of lowercased three-character substrings of ``text``."""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def index_filenames(files):
+    """Store the name trigrams of saved File rows; rows already indexed are skipped."""
+    FileNameTrigram.objects.bulk_create(
+        [
+            FileNameTrigram(file_id=file_record.pk, user_id=file_record.user_id, trigram=trigram)
+            for file_record in files
+            for trigram in get_trigrams(file_record.filename)
+        ],
+        ignore_conflicts=True
+    )
+
+
+def filter_by_substring(queryset, user, text):
+    """
+    Files whose name contains ``text``, narrowed through the trigram index first.
+
+    A name containing ``text`` contains all of its trigrams, so only files
+    holding every one of them are compared with ``text`` itself. Shorter
+    queries have no trigram and fall back to comparing every name.
+    """
+    trigrams = get_trigrams(text)
+    if trigrams:
+        candidates = (
+            FileNameTrigram.objects.filter(user=user, trigram__in=trigrams)
+            .values('file_id')
+            .annotate(matched=Count('id'))
+            .filter(matched=len(trigrams))
+            .values('file_id')
+        )
+        queryset = queryset.filter(id__in=candidates)
+    return queryset.filter(filename__icontains=text)
@@ -1,5 +1,7 @@
-from rest_framework import serializers
-from .models import File
+from django.conf import settings
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .models import File, FileAccessLog
 
 
 class FileUploadSerializer(serializers.Serializer):
@@ -10,3 +12,53 @@ class FileSerializer(serializers.ModelSerializer):
     class Meta:
         model = File
         fields = ('id', 'filename', 'file_url', 'file_size', 'upload_timestamp', 'is_encrypted')
+
+
+def get_field_encoder(field):
+    """
+    Return a function that encodes a database value the way ``field.to_representation`` does.
+
+    Values read with ``values()`` already have the right Python type, so most
+    fields need no work at all; unknown field types fall back to the field itself.
+    """
+    if isinstance(field, serializers.DateTimeField):
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if output_format is None or output_format.lower() != ISO_8601 or not settings.USE_TZ:
+            return field.to_representation
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+        def encode_datetime(value):
+            if not value:
+                return None
+            value = value.astimezone(field_timezone).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+
+        return encode_datetime
+    if isinstance(field, (serializers.IntegerField, serializers.CharField, serializers.BooleanField)):
+        return None
+    return field.to_representation
+
+
+def serialize_rows(serializer_class, rows):
+    """
+    Serialize ``values()`` rows to the same data ``serializer_class(many=True)``
+    produces from model instances, without building any.
+
+    Every serializer field must be a model field read under its own name. The
+    encoders are picked once per call, so the current timezone is honoured.
+    """
+    encoders = [(name, get_field_encoder(field)) for name, field in serializer_class().fields.items()]
+    return [
+        {name: row[name] if encoder is None else encoder(row[name]) for name, encoder in encoders}
+        for row in rows
+    ]
+
+
+class FileAccessLogSerializer(serializers.ModelSerializer):
+    file_name = serializers.CharField(source='file.filename')
+
+    class Meta:
+        model = FileAccessLog
+        fields = ('file_name', 'access_type', 'access_timestamp')
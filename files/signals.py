@@ -0,0 +1,37 @@
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .blobs import release_blob
+from .list_cache import file_list_cache
+from .models import File
+from .search import index_filenames
+
+
+@receiver(post_delete, sender=File)
+def release_file_blob(sender, instance, **kwargs):
+    if instance.blob_id is not None:
+        release_blob(instance.blob_id)
+
+
+@receiver(post_save, sender=File)
+def index_file_name(sender, instance, created, **kwargs):
+    # Names never change after the row is created. bulk_create sends no
+    # signal, so the batch upload indexes its rows itself.
+    if created:
+        index_filenames([instance])
+
+
+@receiver(post_save, sender=File)
+@receiver(post_delete, sender=File)
+def bump_file_list_version(sender, instance, origin=None, **kwargs):
+    # Pending files are not listed. queryset.update() sends no signal, so the
+    # views that flip rows to available bump the version themselves.
+    if instance.status != File.STATUS_AVAILABLE:
+        return
+    # Deleting the user, one or a queryset of them, takes their version row with them.
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if issubclass(origin_model, User):
+        return
+    file_list_cache.bump(instance.user_id)
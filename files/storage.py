@@ -0,0 +1,162 @@
+import os
+import hashlib
+import threading
+
+from pathlib import Path
+
+import boto3
+
+from botocore.config import Config
+from django.conf import settings
+from django.core.cache import cache
+
+
+# A cached presigned URL is only handed out while it has at least this many seconds left.
+PRESIGNED_URL_MIN_LIFETIME = 60
+
+
+def hash_user_id(user_id):
+    """Hash the user ID using SHA-256."""
+    return hashlib.sha256(str(user_id).encode()).hexdigest()
+
+
+def get_file_key(user_id, filename):
+    """Return the S3 key a user's file is stored under."""
+    return f"{hash_user_id(user_id)}/{filename}"
+
+
+def get_blob_key(sha256):
+    """Return the S3 key content with this SHA-256 digest is stored under."""
+    return f"{settings.S3_BLOB_PREFIX}{sha256[:2]}/{sha256}"
+
+
+def get_line_index_key(blob_key):
+    """Return the S3 key a blob's line index is stored under."""
+    return f"{blob_key}.lines"
+
+
+def get_object_key(file_record):
+    """Return the S3 key holding a File's content."""
+    if file_record.blob_id is not None:
+        return get_blob_key(file_record.blob.sha256)
+    return get_file_key(file_record.user_id, file_record.filename)
+
+
+def get_object_codec(file_record):
+    """Return the codec a File's content is compressed with in S3, '' if it is stored as is."""
+    if file_record.blob_id is not None:
+        return file_record.blob.codec
+    return ''
+
+
+def get_object_url(key):
+    return f"https://{settings.AWS_BUCKET_NAME}.s3.amazonaws.com/{key}"
+
+
+def get_presigned_download_url(key, filename):
+    """Return a presigned GET URL serving the object as an attachment, reusing a cached one while it has time left."""
+    disposition = f'attachment; filename="{filename}"'
+    cache_key = "presigned-download:" + hashlib.sha256(f"{key}\n{disposition}".encode()).hexdigest()
+    url = cache.get(cache_key)
+    if url is None:
+        url = get_s3_client().generate_presigned_url(
+            'get_object',
+            Params={
+                "Bucket": settings.AWS_BUCKET_NAME,
+                "Key": key,
+                "ResponseContentDisposition": disposition,
+                "ResponseContentType": "text/plain",
+            },
+            ExpiresIn=settings.PRESIGNED_DOWNLOAD_EXPIRY
+        )
+        timeout = settings.PRESIGNED_DOWNLOAD_EXPIRY - PRESIGNED_URL_MIN_LIFETIME
+        if timeout > 0:
+            cache.set(cache_key, url, timeout)
+    return url
+
+
+def get_upload_session_path(session_id):
+    """Return the local file a resumable upload session stages its bytes in."""
+    return Path(settings.UPLOAD_SESSION_DIR) / f"{session_id.hex}.part"
+
+
+class S3ClientRegistry:
+    """
+    Process-wide registry of S3 clients.
+
+    boto3 clients are thread-safe, so one client (and its connection pool) is
+    shared by every request thread of a process. Clients are never carried
+    across a fork: pre-fork servers get a fresh client in each worker.
+    ``lookups`` counts calls and ``clients_created`` the clients built for them;
+    neither says how often a pooled connection was reused.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._pid = os.getpid()
+        self.lookups = 0
+        self.clients_created = 0
+
+    def get_client(self, region_name=None):
+        region_name = region_name or settings.AWS_REGION_NAME
+        if self._pid != os.getpid():
+            self.reset()
+
+        with self._lock:
+            self.lookups += 1
+            client = self._clients.get(region_name)
+            if client is None:
+                self.clients_created += 1
+                client = self._create_client(region_name)
+                self._clients[region_name] = client
+        return client
+
+    def _create_client(self, region_name):
+        # Sessions are not thread-safe, so each client gets its own.
+        session = boto3.session.Session(
+            aws_access_key_id=settings.AWS_ACCESS_KEY,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=region_name
+        )
+        return session.client(
+            's3',
+            config=Config(
+                max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                tcp_keepalive=True,
+                signature_version='s3v4',  # required for presigned GETs of KMS-encrypted objects
+                retries={'max_attempts': 3, 'mode': 'standard'}
+            )
+        )
+
+    def reset(self):
+        """Forget every client so the next call builds a new one."""
+        with self._lock:
+            self._clients = {}
+            self._pid = os.getpid()
+
+    def _after_fork(self):
+        # The parent's lock may have been held at fork time, so replace it.
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._pid = os.getpid()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "clients_created": self.clients_created,
+                "clients": len(self._clients),
+                "max_pool_connections": settings.S3_MAX_POOL_CONNECTIONS,
+            }
+
+
+s3_clients = S3ClientRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=s3_clients._after_fork)
+
+
+def get_s3_client():
+    """Return the shared S3 client of this process."""
+    return s3_clients.get_client()
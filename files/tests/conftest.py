@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def synchronous_access_log(settings):
+    """Write access logs immediately, so tests can assert on them without a flush."""
+    settings.ACCESS_LOG_BUFFERED = False
+
+
+@pytest.fixture(autouse=True)
+def uncached_file_lists(settings):
+    """
+    Bypass the file list cache: test transactions never commit, so the cached
+    version would never move. Tests of the cache itself switch it back on.
+    """
+    settings.CACHES = {**settings.CACHES, 'file_lists': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
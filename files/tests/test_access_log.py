@@ -0,0 +1,73 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+
+from files.access_log import AccessLogWriter
+from files.models import File, FileAccessLog
+
+
+@pytest.fixture
+def file_record(db):
+    user = User.objects.create_user(username='testuser', password='password')
+    return File.objects.create(user=user, filename='test.txt', file_url='', file_size=1024)
+
+
+class TestAccessLogWriter:
+    def test_rows_are_buffered_until_flushed(self, file_record, settings, django_assert_num_queries):
+        settings.ACCESS_LOG_BUFFERED = True
+        settings.ACCESS_LOG_BATCH_SIZE = 100
+        settings.ACCESS_LOG_FLUSH_INTERVAL = 3600
+        writer = AccessLogWriter()
+
+        with django_assert_num_queries(0):
+            for _ in range(3):
+                writer.record(file=file_record, user=file_record.user, access_type="view")
+        assert not FileAccessLog.objects.exists()
+
+        with django_assert_num_queries(1):
+            writer.flush()
+        assert FileAccessLog.objects.filter(file=file_record, access_type="view").count() == 3
+        writer.close()
+
+    def test_synchronous_mode(self, file_record):
+        AccessLogWriter().record(file=file_record, user=file_record.user, access_type="download")
+        assert FileAccessLog.objects.filter(file=file_record, access_type="download").exists()
+
+    def test_overflow_is_written_synchronously(self, file_record, settings):
+        settings.ACCESS_LOG_BUFFERED = True
+        settings.ACCESS_LOG_FLUSH_INTERVAL = 3600
+        settings.ACCESS_LOG_MAX_PENDING = 1
+        writer = AccessLogWriter()
+        writer.record(file=file_record, user=file_record.user, access_type="view")
+        writer.record(file=file_record, user=file_record.user, access_type="view")
+        assert FileAccessLog.objects.count() == 1
+        writer.flush()
+        assert FileAccessLog.objects.count() == 2
+        writer.close()
+
+    def test_async_overflow_is_written_off_the_event_loop(self, file_record, settings):
+        settings.ACCESS_LOG_BUFFERED = True
+        settings.ACCESS_LOG_MAX_PENDING = 0
+        writer = AccessLogWriter()
+        async_to_sync(writer.arecord)(file=file_record, user=file_record.user, access_type="download")
+        assert FileAccessLog.objects.filter(file=file_record, access_type="download").count() == 1
+        writer.close()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_rows_of_deleted_files_do_not_sink_the_batch(self, file_record, settings):
+        settings.ACCESS_LOG_BUFFERED = True
+        settings.ACCESS_LOG_BATCH_SIZE = 100
+        settings.ACCESS_LOG_FLUSH_INTERVAL = 3600
+        other_user = User.objects.create_user(username='other', password='password')
+        other_file = File.objects.create(user=other_user, filename='other.txt', file_url='', file_size=1024)
+        writer = AccessLogWriter()
+        writer.record(file=file_record, user=file_record.user, access_type="view")
+        writer.record(file=other_file, user=other_user, access_type="view")
+        writer.record(file=file_record, user=file_record.user, access_type="download")
+        File.objects.filter(pk=other_file.pk).delete()  # by another request
+
+        writer.flush()
+
+        assert sorted(FileAccessLog.objects.values_list('access_type', flat=True)) == ['download', 'view']
+        assert writer.written == 2
+        writer.close()
@@ -4,11 +4,26 @@ from rest_framework.test import APIClient
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework import status
+from django.db import IntegrityError
 from moto import mock_s3
 import boto3
 from django.conf import settings
 import hashlib
-from files.models import File
+import uuid
+import gzip
+import unicodedata
+from datetime import timedelta
+from django.utils import timezone
+from files.models import File, FileAccessLog, FileAccessRollup, FileListVersion, FileNameTrigram, UploadSession
+from files.views import FileUploadAPI, get_file_etag
+from files.storage import get_object_key, get_upload_session_path
+from files.content_cache import content_cache
+from files.list_cache import file_list_cache
+
+@pytest.fixture(autouse=True)
+def empty_content_cache():
+    content_cache.clear()
+
 
 @pytest.fixture
 def api_client():
@@ -72,6 +87,14 @@ class TestFileUploadAPI:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert 'The file content must be plain text.' in response.data['error']
 
+    def test_file_upload_invalid_content_past_first_kilobyte(self, authenticated_client, user, s3_bucket):
+        invalid_content = SimpleUploadedFile("test.txt", b"a" * 1500 + b"\xff" + b"a" * 100, content_type="text/plain")
+        url = reverse('files:api_file_upload')
+        response = authenticated_client.post(url, {'file': invalid_content}, format='multipart')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['error'] == 'The file content must be plain text.'
+        assert not File.objects.filter(user=user).exists()
+
     def test_file_upload_too_small(self, authenticated_client, s3_bucket):
         small_file = SimpleUploadedFile("test.txt", b"a"*100, content_type="text/plain")  # 100 bytes
         url = reverse('files:api_file_upload')
@@ -88,6 +111,246 @@ class TestFileUploadAPI:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert 'File size exceeds 2KB limit.' in response.data['error']
 
+    def test_file_upload_duplicate_name(self, authenticated_client, user, s3_bucket):
+        url = reverse('files:api_file_upload')
+        for _ in range(3):
+            upload = SimpleUploadedFile("test.txt", b'a' * 1024, content_type="text/plain")
+            response = authenticated_client.post(url, {'file': upload}, format='multipart')
+            assert response.status_code == status.HTTP_201_CREATED
+
+        filenames = set(File.objects.filter(user=user).values_list('filename', flat=True))
+        assert filenames == {'test.txt', 'test (1).txt', 'test (2).txt'}
+
+    def test_file_upload_deduplicates_content(self, authenticated_client, user, s3_bucket):
+        url = reverse('files:api_file_upload')
+        for filename in ('first.txt', 'second.txt'):
+            upload = SimpleUploadedFile(filename, b'a' * 1024, content_type="text/plain")
+            response = authenticated_client.post(url, {'file': upload}, format='multipart')
+            assert response.status_code == status.HTTP_201_CREATED
+
+        first, second = File.objects.filter(user=user).order_by('filename')
+        assert first.blob_id == second.blob_id
+        assert first.blob.ref_count == 2
+        stored_keys = [obj['Key'] for obj in s3_bucket.list_objects_v2(Bucket=settings.AWS_BUCKET_NAME)['Contents']]
+        assert stored_keys == [get_object_key(first), f"{get_object_key(first)}.lines"]
+
+        second.delete()
+        first.blob.refresh_from_db()
+        assert first.blob.ref_count == 1
+
+    def test_generate_unique_filename_single_query(self, user, django_assert_num_queries):
+        for filename in ('report.txt', 'report (1).txt', 'report (3).txt', 'report (x).txt', 'other.txt'):
+            File.objects.create(user=user, filename=filename, file_url='', file_size=1024)
+
+        with django_assert_num_queries(1):
+            assert FileUploadAPI().generate_unique_filename(user, 'report.txt') == 'report (2).txt'
+        with django_assert_num_queries(1):
+            assert FileUploadAPI().generate_unique_filename(user, 'new.txt') == 'new.txt'
+
+    def test_generate_unique_filename_ignores_case(self, user):
+        # The unique index compares names case-insensitively under MySQL's default collation.
+        File.objects.create(user=user, filename='Report.txt', file_url='', file_size=1024)
+        File.objects.create(user=user, filename='REPORT (1).TXT', file_url='', file_size=1024)
+        assert FileUploadAPI().generate_unique_filename(user, 'report.txt') == 'report (2).txt'
+
+    def test_generate_unique_filename_beyond_the_first_candidates(self, user):
+        File.objects.create(user=user, filename='report.txt', file_url='', file_size=1024)
+        for counter in range(1, 25):
+            File.objects.create(user=user, filename=f'report ({counter}).txt', file_url='', file_size=1024)
+        assert FileUploadAPI().generate_unique_filename(user, 'report.txt') == 'report (25).txt'
+
+    def test_file_upload_accent_variant(self, authenticated_client, user, s3_bucket, monkeypatch):
+        # Emulate MySQL's accent-insensitive unique index, which the test database does not have.
+        def fold(filename):
+            return ''.join(c for c in unicodedata.normalize('NFKD', filename) if not unicodedata.combining(c)).lower()
+
+        save = File.save
+
+        def save_under_collation(file_record, *args, **kwargs):
+            others = File.objects.filter(user_id=file_record.user_id).exclude(pk=file_record.pk)
+            if any(fold(name) == fold(file_record.filename) for name in others.values_list('filename', flat=True)):
+                raise IntegrityError("Duplicate entry for key 'unique_user_filename'")
+            return save(file_record, *args, **kwargs)
+
+        monkeypatch.setattr(File, 'save', save_under_collation)
+        url = reverse('files:api_file_upload')
+        for filename in ('resume.txt', 'résumé.txt'):
+            upload = SimpleUploadedFile(filename, b'a' * 1024, content_type='text/plain')
+            response = authenticated_client.post(url, {'file': upload}, format='multipart')
+            assert response.status_code == status.HTTP_201_CREATED
+        assert sorted(File.objects.filter(user=user).values_list('filename', flat=True)) == ['resume.txt', 'résumé (1).txt']
+
+
+class TestFileBatchUploadAPI:
+    def test_batch_upload_success(self, authenticated_client, user, s3_bucket):
+        url = reverse('files:api_file_batch_upload')
+        files = [
+            SimpleUploadedFile("a.txt", b'a' * 1024, content_type="text/plain"),
+            SimpleUploadedFile("a.txt", b'b' * 1024, content_type="text/plain"),
+            SimpleUploadedFile("b.txt", b'c' * 1024, content_type="text/plain"),
+        ]
+        response = authenticated_client.post(url, {'files': files}, format='multipart')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [result['filename'] for result in response.data['results']] == ['a.txt', 'a (1).txt', 'b.txt']
+
+        assert File.objects.available().filter(user=user).count() == 3
+        file_record = File.objects.get(user=user, filename='a (1).txt')
+        s3_object = s3_bucket.get_object(Bucket=settings.AWS_BUCKET_NAME, Key=get_object_key(file_record))
+        assert s3_object['Body'].read() == b'b' * 1024
+
+    def test_batch_upload_partial_failure(self, authenticated_client, user, s3_bucket):
+        url = reverse('files:api_file_batch_upload')
+        files = [
+            SimpleUploadedFile("good.txt", b'a' * 1024, content_type="text/plain"),
+            SimpleUploadedFile("bad.jpg", b'a' * 1024, content_type="image/jpeg"),
+            SimpleUploadedFile("large.txt", b'a' * 3000, content_type="text/plain"),
+        ]
+        response = authenticated_client.post(url, {'files': files}, format='multipart')
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        assert response.data['results'] == [
+            {'file': 'good.txt', 'status': 'uploaded', 'filename': 'good.txt'},
+            {'file': 'bad.jpg', 'error': 'Only .txt files are allowed.'},
+            {'file': 'large.txt', 'error': 'File size exceeds 2KB limit.'},
+        ]
+        assert list(File.objects.filter(user=user).values_list('filename', flat=True)) == ['good.txt']
+
+    def test_batch_upload_no_files(self, authenticated_client, s3_bucket):
+        url = reverse('files:api_file_batch_upload')
+        response = authenticated_client.post(url, {}, format='multipart')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestFilePresignedUploadAPI:
+    def presign(self, client, filename='direct.txt'):
+        url = reverse('files:api_file_presign_upload')
+        return client.post(url, {'filename': filename}, format='json')
+
+    def test_presign_and_complete(self, authenticated_client, user, s3_bucket):
+        response = self.presign(authenticated_client)
+        assert response.status_code == status.HTTP_200_OK
+        hashed_user_id = hashlib.sha256(str(user.id).encode()).hexdigest()
+        key = response.data['key']
+        assert key.startswith(f"staging/{hashed_user_id}/")
+        assert response.data['fields']['key'] == key
+
+        s3_bucket.put_object(Bucket=settings.AWS_BUCKET_NAME, Key=key, Body=b'a' * 1024, ContentType='text/plain')
+        url = reverse('files:api_file_upload_complete')
+        response = authenticated_client.post(url, {'key': key, 'filename': 'direct.txt'}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+
+        file_record = File.objects.available().get(user=user, filename='direct.txt', file_size=1024)
+        assert file_record.blob.sha256 == hashlib.sha256(b'a' * 1024).hexdigest()
+        s3_object = s3_bucket.get_object(Bucket=settings.AWS_BUCKET_NAME, Key=get_object_key(file_record))
+        assert s3_object['Body'].read() == b'a' * 1024
+        assert 'Contents' not in s3_bucket.list_objects_v2(Bucket=settings.AWS_BUCKET_NAME, Prefix='staging/')
+
+    def test_presign_rejects_non_text_file(self, authenticated_client, s3_bucket):
+        response = self.presign(authenticated_client, 'image.jpg')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_complete_rejects_binary_content(self, authenticated_client, user, s3_bucket):
+        key = self.presign(authenticated_client).data['key']
+        s3_bucket.put_object(Bucket=settings.AWS_BUCKET_NAME, Key=key, Body=b'\x00' * 1024, ContentType='text/plain')
+        url = reverse('files:api_file_upload_complete')
+        response = authenticated_client.post(url, {'key': key, 'filename': 'direct.txt'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['error'] == 'The file content must be plain text.'
+        assert not File.objects.filter(user=user).exists()
+
+    def test_complete_rejects_foreign_key(self, authenticated_client, s3_bucket):
+        url = reverse('files:api_file_upload_complete')
+        response = authenticated_client.post(url, {'key': 'staging/other-user/abc', 'filename': 'direct.txt'}, format='json')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.fixture
+def upload_session_dir(settings, tmp_path):
+    settings.UPLOAD_SESSION_DIR = str(tmp_path)
+    return tmp_path
+
+
+class TestFileUploadSessionAPI:
+    def start(self, client, size=1024):
+        url = reverse('files:api_upload_session')
+        return client.post(url, {'filename': 'resumed.txt', 'size': size}, format='json')
+
+    def send(self, client, session_id, offset, chunk):
+        url = reverse('files:api_upload_session_detail', kwargs={'session_id': session_id})
+        return client.generic('PATCH', url, chunk, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+
+    def test_resumable_upload(self, authenticated_client, user, s3_bucket, upload_session_dir):
+        response = self.start(authenticated_client)
+        assert response.status_code == status.HTTP_201_CREATED
+        session_id = response.data['session_id']
+
+        assert self.send(authenticated_client, session_id, 0, b'a' * 600).data['offset'] == 600
+        # A retry of the first chunk is refused with the current offset.
+        response = self.send(authenticated_client, session_id, 0, b'a' * 600)
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response['Upload-Offset'] == '600'
+
+        url = reverse('files:api_upload_session_detail', kwargs={'session_id': session_id})
+        assert authenticated_client.get(url).data['offset'] == 600
+        assert self.send(authenticated_client, session_id, 600, b'b' * 424).data['offset'] == 1024
+
+        url = reverse('files:api_upload_session_complete', kwargs={'session_id': session_id})
+        response = authenticated_client.post(url)
+        assert response.status_code == status.HTTP_201_CREATED
+
+        file_record = File.objects.get(user=user, filename='resumed.txt')
+        s3_object = s3_bucket.get_object(Bucket=settings.AWS_BUCKET_NAME, Key=get_object_key(file_record))
+        assert s3_object['Body'].read() == b'a' * 600 + b'b' * 424
+        assert list(upload_session_dir.iterdir()) == []
+
+    def test_complete_rejects_binary_content(self, authenticated_client, user, s3_bucket, upload_session_dir):
+        session_id = self.start(authenticated_client).data['session_id']
+        self.send(authenticated_client, session_id, 0, b'a' * 1023 + b'\x00')
+        url = reverse('files:api_upload_session_complete', kwargs={'session_id': session_id})
+        response = authenticated_client.post(url)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['error'] == 'The file content must be plain text.'
+        assert not File.objects.filter(user=user).exists()
+
+    def test_chunk_past_declared_size(self, authenticated_client, s3_bucket, upload_session_dir):
+        session_id = self.start(authenticated_client).data['session_id']
+        response = self.send(authenticated_client, session_id, 0, b'a' * 1025)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_chunk_raced_by_another_patch(self, authenticated_client, s3_bucket, upload_session_dir, monkeypatch):
+        session_id = self.start(authenticated_client).data['session_id']
+        self.send(authenticated_client, session_id, 0, b'a' * 600)
+
+        # A second PATCH that read the session before the first one finished.
+        get = UploadSession.objects.get
+
+        def stale_get(*args, **kwargs):
+            upload_session = get(*args, **kwargs)
+            upload_session.offset = 0
+            return upload_session
+
+        monkeypatch.setattr(UploadSession.objects, 'get', stale_get)
+        response = self.send(authenticated_client, session_id, 0, b'b' * 600)
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response['Upload-Offset'] == '600'
+        assert get_upload_session_path(uuid.UUID(session_id)).read_bytes() == b'a' * 600
+
+    def test_staged_bytes_gone(self, authenticated_client, s3_bucket, upload_session_dir):
+        session_id = self.start(authenticated_client).data['session_id']
+        for path in upload_session_dir.iterdir():
+            path.unlink()
+        assert self.send(authenticated_client, session_id, 0, b'a' * 100).status_code == status.HTTP_410_GONE
+        url = reverse('files:api_upload_session_complete', kwargs={'session_id': session_id})
+        UploadSession.objects.filter(pk=session_id).update(offset=1024)
+        assert authenticated_client.post(url).status_code == status.HTTP_410_GONE
+
+    def test_complete_before_all_bytes_arrived(self, authenticated_client, s3_bucket, upload_session_dir):
+        session_id = self.start(authenticated_client).data['session_id']
+        self.send(authenticated_client, session_id, 0, b'a' * 100)
+        url = reverse('files:api_upload_session_complete', kwargs={'session_id': session_id})
+        response = authenticated_client.post(url)
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.data['offset'] == 100
+
 
 class TestFileDownloadAPI:
     def test_file_download_success(self, authenticated_client, user, s3_bucket):
@@ -107,9 +370,101 @@ class TestFileDownloadAPI:
         url = reverse('files:api_file_download', kwargs={'file_name': file_name})
         response = authenticated_client.get(url)
         assert response.status_code == status.HTTP_200_OK
-        assert response.content == file_content
+        assert b''.join(response.streaming_content) == file_content
+        assert response['Content-Length'] == str(len(file_content))
         assert response['Content-Disposition'] == f'attachment; filename="{file_name}"'
 
+    def upload_legacy_file(self, user, file_content, file_name='test.txt'):
+        s3 = boto3.client('s3', region_name=settings.AWS_REGION_NAME)
+        hashed_user_id = hashlib.sha256(str(user.id).encode()).hexdigest()
+        s3.put_object(Bucket=settings.AWS_BUCKET_NAME, Key=f"{hashed_user_id}/{file_name}", Body=file_content)
+        File.objects.create(user=user, filename=file_name, file_url='', file_size=len(file_content), is_encrypted=True)
+
+    def test_file_download_range(self, authenticated_client, user, s3_bucket):
+        file_content = bytes(range(48, 123)) * 20
+        self.upload_legacy_file(user, file_content)
+        url = reverse('files:api_file_download', kwargs={'file_name': 'test.txt'})
+
+        response = authenticated_client.get(url, HTTP_RANGE='bytes=10-19')
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response['Content-Range'] == f'bytes 10-19/{len(file_content)}'
+        assert response['Content-Length'] == '10'
+        assert b''.join(response.streaming_content) == file_content[10:20]
+
+        response = authenticated_client.get(url, HTTP_RANGE='bytes=-5')
+        assert b''.join(response.streaming_content) == file_content[-5:]
+
+    def test_file_download_multiple_ranges(self, authenticated_client, user, s3_bucket):
+        file_content = bytes(range(48, 123)) * 20
+        self.upload_legacy_file(user, file_content)
+        url = reverse('files:api_file_download', kwargs={'file_name': 'test.txt'})
+
+        response = authenticated_client.get(url, HTTP_RANGE='bytes=0-4, 100-109')
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        content_type, boundary = response['Content-Type'].split('; boundary=')
+        assert content_type == 'multipart/byteranges'
+        body = b''.join(response.streaming_content)
+        assert response['Content-Length'] == str(len(body))
+        assert body == (
+            f'--{boundary}\r\nContent-Type: text/plain\r\nContent-Range: bytes 0-4/{len(file_content)}\r\n\r\n'.encode()
+            + file_content[0:5] + b'\r\n'
+            + f'--{boundary}\r\nContent-Type: text/plain\r\nContent-Range: bytes 100-109/{len(file_content)}\r\n\r\n'.encode()
+            + file_content[100:110] + b'\r\n'
+            + f'--{boundary}--\r\n'.encode()
+        )
+
+    def test_file_download_unsatisfiable_range(self, authenticated_client, user, s3_bucket):
+        self.upload_legacy_file(user, b'a' * 1024)
+        url = reverse('files:api_file_download', kwargs={'file_name': 'test.txt'})
+        response = authenticated_client.get(url, HTTP_RANGE='bytes=2000-')
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response['Content-Range'] == 'bytes */1024'
+
+    def test_file_download_malformed_range(self, authenticated_client, user, s3_bucket):
+        self.upload_legacy_file(user, b'a' * 1024)
+        url = reverse('files:api_file_download', kwargs={'file_name': 'test.txt'})
+        response = authenticated_client.get(url, HTTP_RANGE='bytes=--5')
+        assert response.status_code == status.HTTP_200_OK
+        assert b''.join(response.streaming_content) == b'a' * 1024
+
+    def test_file_download_not_modified(self, authenticated_client, user, s3_bucket):
+        self.upload_legacy_file(user, b'a' * 1024)
+        url = reverse('files:api_file_download', kwargs={'file_name': 'test.txt'})
+        response = authenticated_client.get(url)
+        b''.join(response.streaming_content)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        # With the object gone from S3, only an answer from the database row can succeed.
+        s3_bucket.delete_object(Bucket=settings.AWS_BUCKET_NAME, Key=get_object_key(File.objects.get(user=user)))
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        response = authenticated_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_file_download_if_range(self, authenticated_client, user, s3_bucket):
+        self.upload_legacy_file(user, b'a' * 1024)
+        url = reverse('files:api_file_download', kwargs={'file_name': 'test.txt'})
+        etag = authenticated_client.get(url)['ETag']
+
+        response = authenticated_client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        response = authenticated_client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        assert response.status_code == status.HTTP_200_OK
+        assert b''.join(response.streaming_content) == b'a' * 1024
+
+    def test_file_download_redirect_mode(self, authenticated_client, user, s3_bucket, monkeypatch):
+        monkeypatch.setattr('files.views.FILE_DOWNLOAD_MODE', 'redirect')
+        self.upload_legacy_file(user, b'a' * 1024)
+        url = reverse('files:api_file_download', kwargs={'file_name': 'test.txt'})
+
+        response = authenticated_client.get(url)
+        assert response.status_code == status.HTTP_302_FOUND
+        assert 'response-content-disposition=attachment' in response['Location']
+        assert FileAccessLog.objects.filter(user=user, access_type='download').count() == 1
+        # The presigned URL is reused until shortly before it expires.
+        assert authenticated_client.get(url)['Location'] == response['Location']
+
     def test_file_download_not_found(self, authenticated_client):
         url = reverse('files:api_file_download', kwargs={'file_name': 'nonexistent.txt'})
         response = authenticated_client.get(url)
@@ -142,6 +497,60 @@ class TestFileContentAPI:
         assert response.data['file_name'] == file_name
         assert response.data['content'] == file_content.decode('utf-8')
 
+    def test_file_content_not_modified(self, authenticated_client, user, s3_bucket):
+        File.objects.create(user=user, filename='test.txt', file_url='', file_size=1024, is_encrypted=True)
+        url = reverse('files:api_file_content', kwargs={'file_name': 'test.txt'})
+        etag = get_file_etag(File.objects.get(user=user))
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_file_content_is_served_from_cache(self, authenticated_client, user, s3_bucket):
+        url = reverse('files:api_file_upload')
+        authenticated_client.post(url, {'file': SimpleUploadedFile("test.txt", b'a' * 1024, content_type="text/plain")}, format='multipart')
+        url = reverse('files:api_file_content', kwargs={'file_name': 'test.txt'})
+        assert authenticated_client.get(url).status_code == status.HTTP_200_OK
+
+        # A hot file no longer needs S3 at all.
+        s3_bucket.delete_object(Bucket=settings.AWS_BUCKET_NAME, Key=get_object_key(File.objects.get(user=user)))
+        hits = content_cache.hits
+        response = authenticated_client.get(url)
+        assert response.data['content'] == 'a' * 1024
+        assert content_cache.hits == hits + 1
+
+        url = reverse('files:api_file_download', kwargs={'file_name': 'test.txt'})
+        assert b''.join(authenticated_client.get(url).streaming_content) == b'a' * 1024
+
+    def test_file_content_pages(self, authenticated_client, user, s3_bucket, monkeypatch):
+        monkeypatch.setattr('files.views.LINE_INDEX_STRIDE', 4)
+        lines = [f'line {number}\n'.encode() for number in range(100)]
+        url = reverse('files:api_file_upload')
+        upload = SimpleUploadedFile("lines.txt", b''.join(lines), content_type="text/plain")
+        assert authenticated_client.post(url, {'file': upload}, format='multipart').status_code == status.HTTP_201_CREATED
+        assert File.objects.get(user=user).blob.has_line_index
+
+        url = reverse('files:api_file_content', kwargs={'file_name': 'lines.txt'})
+        response = authenticated_client.get(url, {'offset': 10, 'limit': 5})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['content'] == b''.join(lines[10:15]).decode()
+        assert response.data['total_lines'] == 100
+        assert response.data['next_offset'] == 15
+
+        response = authenticated_client.get(url, {'offset': 97, 'limit': 5})
+        assert response.data['content'] == b''.join(lines[97:]).decode()
+        assert response.data['next_offset'] is None
+        assert authenticated_client.get(url, {'offset': 200}).data['content'] == ''
+        assert authenticated_client.get(url, {'limit': 0}).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_file_content_pages_without_line_index(self, authenticated_client, user, s3_bucket):
+        s3 = boto3.client('s3', region_name=settings.AWS_REGION_NAME)
+        hashed_user_id = hashlib.sha256(str(user.id).encode()).hexdigest()
+        s3.put_object(Bucket=settings.AWS_BUCKET_NAME, Key=f"{hashed_user_id}/test.txt", Body=b"one\ntwo\nthree")
+        File.objects.create(user=user, filename='test.txt', file_url='', file_size=13, is_encrypted=True)
+        url = reverse('files:api_file_content', kwargs={'file_name': 'test.txt'})
+        response = authenticated_client.get(url, {'offset': 1, 'limit': 5})
+        assert response.data['content'] == 'two\nthree'
+        assert response.data['total_lines'] == 3
+
     def test_file_content_not_found(self, authenticated_client):
         url = reverse('files:api_file_content', kwargs={'file_name': 'nonexistent.txt'})
         response = authenticated_client.get(url)
@@ -154,6 +563,76 @@ class TestFileContentAPI:
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
 
+
+@pytest.fixture
+def gzip_storage(monkeypatch):
+    monkeypatch.setattr('files.views.FILE_STORAGE_CODEC', 'gzip')
+
+
+class TestCompressedStorage:
+    content = b'compressible line of text\n' * 40
+
+    def upload(self, client):
+        url = reverse('files:api_file_upload')
+        test_file = SimpleUploadedFile("test.txt", self.content, content_type="text/plain")
+        return client.post(url, {'file': test_file}, format='multipart')
+
+    def test_upload_is_stored_compressed(self, authenticated_client, user, s3_bucket, gzip_storage):
+        assert self.upload(authenticated_client).status_code == status.HTTP_201_CREATED
+
+        file_record = File.objects.select_related('blob').get(user=user, filename='test.txt')
+        assert file_record.file_size == len(self.content)
+        assert file_record.blob.codec == 'gzip'
+        s3_object = s3_bucket.get_object(Bucket=settings.AWS_BUCKET_NAME, Key=get_object_key(file_record))
+        stored = s3_object['Body'].read()
+        assert file_record.blob.stored_size == len(stored) < len(self.content)
+        assert gzip.decompress(stored) == self.content
+
+    def test_download_passes_compressed_bytes_through(self, authenticated_client, s3_bucket, gzip_storage):
+        self.upload(authenticated_client)
+        url = reverse('files:api_file_download', kwargs={'file_name': 'test.txt'})
+        response = authenticated_client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Encoding'] == 'gzip'
+        assert response['Content-Length'] == str(File.objects.get(filename='test.txt').blob.stored_size)
+        assert 'Accept-Encoding' in response['Vary']
+        assert gzip.decompress(b''.join(response.streaming_content)) == self.content
+
+    def test_download_decompresses_for_other_clients(self, authenticated_client, s3_bucket, gzip_storage):
+        self.upload(authenticated_client)
+        url = reverse('files:api_file_download', kwargs={'file_name': 'test.txt'})
+        response = authenticated_client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        assert not response.has_header('Content-Encoding')
+        assert response['Content-Length'] == str(len(self.content))
+        assert b''.join(response.streaming_content) == self.content
+
+        url = reverse('files:api_file_content', kwargs={'file_name': 'test.txt'})
+        response = authenticated_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        assert response.data['content'] == self.content.decode()
+
+    def test_download_ignores_range(self, authenticated_client, s3_bucket, gzip_storage):
+        self.upload(authenticated_client)
+        url = reverse('files:api_file_download', kwargs={'file_name': 'test.txt'})
+        response = authenticated_client.get(url, HTTP_RANGE='bytes=0-9')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Accept-Ranges'] == 'none'
+        assert b''.join(response.streaming_content) == self.content
+
+    def test_resumable_upload_is_stored_compressed(self, authenticated_client, user, s3_bucket, upload_session_dir, gzip_storage):
+        response = authenticated_client.post(reverse('files:api_upload_session'), {'filename': 'resumed.txt', 'size': len(self.content)}, format='json')
+        session_id = response.data['session_id']
+        url = reverse('files:api_upload_session_detail', kwargs={'session_id': session_id})
+        authenticated_client.generic('PATCH', url, self.content, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET='0')
+        response = authenticated_client.post(reverse('files:api_upload_session_complete', kwargs={'session_id': session_id}))
+        assert response.status_code == status.HTTP_201_CREATED
+
+        file_record = File.objects.select_related('blob').get(user=user, filename='resumed.txt')
+        s3_object = s3_bucket.get_object(Bucket=settings.AWS_BUCKET_NAME, Key=get_object_key(file_record))
+        stored = s3_object['Body'].read()
+        assert file_record.blob.stored_size == len(stored)
+        assert gzip.decompress(stored) == self.content
+
+
 class TestFileListAPI:
     def test_file_list_success(self, authenticated_client, user):
         File.objects.create(
@@ -176,6 +655,52 @@ class TestFileListAPI:
         files = response.data['files']
         assert len(files) == 2
 
+    def test_file_list_not_modified(self, authenticated_client, user):
+        File.objects.create(user=user, filename='test1.txt', file_url='', file_size=1024)
+        second = File.objects.create(user=user, filename='test2.txt', file_url='', file_size=1024)
+        url = reverse('files:api_file_list')
+        etag = authenticated_client.get(url)['ETag']
+        assert authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        second.delete()
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['files']) == 1
+
+    def test_file_list_pages(self, authenticated_client, user):
+        for i in range(5):
+            File.objects.create(user=user, filename=f'test{i}.txt', file_url='', file_size=1024)
+        url = reverse('files:api_file_list')
+        filenames = []
+        cursor = None
+        while True:
+            response = authenticated_client.get(url, {'limit': 2, 'cursor': cursor} if cursor else {'limit': 2})
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.data['files']) <= 2
+            filenames += [file['filename'] for file in response.data['files']]
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                break
+        assert filenames == [f'test{i}.txt' for i in reversed(range(5))]
+
+    def test_file_list_invalid_page(self, authenticated_client):
+        url = reverse('files:api_file_list')
+        assert authenticated_client.get(url, {'limit': 0}).status_code == status.HTTP_400_BAD_REQUEST
+        assert authenticated_client.get(url, {'cursor': 'bm9wZQ=='}).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_file_list_hides_pending_files(self, authenticated_client, user):
+        File.objects.create(
+            user=user,
+            filename='pending.txt',
+            file_url='http://example.com/pending.txt',
+            file_size=1024,
+            status=File.STATUS_PENDING
+        )
+        url = reverse('files:api_file_list')
+        response = authenticated_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['files'] == []
+
     def test_file_list_empty(self, authenticated_client):
         url = reverse('files:api_file_list')
         response = authenticated_client.get(url)
@@ -187,3 +712,154 @@ class TestFileListAPI:
         url = reverse('files:api_file_list')
         response = api_client.get(url)
         assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestAccessStatsAPI:
+    def test_file_stats(self, authenticated_client, user):
+        file = File.objects.create(user=user, filename='test.txt', file_url='', file_size=1024)
+        now = timezone.now()
+        for minutes, access_type in enumerate(['view', 'download', 'view']):
+            FileAccessLog.objects.create(file=file, user=user, access_type=access_type, access_timestamp=now - timedelta(minutes=minutes))
+        FileAccessRollup.objects.create(file=file, user=user, day=(now - timedelta(days=40)).date(), access_type='download', count=4)
+
+        url = reverse('files:api_file_stats', kwargs={'file_name': 'test.txt'})
+        response = authenticated_client.get(url, {'limit': 2})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['counts'] == {'view': 2, 'download': 5}
+        assert [access['access_type'] for access in response.data['accesses']] == ['view', 'download']
+
+        response = authenticated_client.get(url, {'limit': 2, 'cursor': response.data['next_cursor']})
+        assert [access['access_type'] for access in response.data['accesses']] == ['view']
+        assert response.data['next_cursor'] is None
+
+    def test_user_stats(self, authenticated_client, user):
+        for filename in ('a.txt', 'b.txt'):
+            file = File.objects.create(user=user, filename=filename, file_url='', file_size=1024)
+            FileAccessLog.objects.create(file=file, user=user, access_type='view')
+        other = User.objects.create_user(username='other', password='password')
+        other_file = File.objects.create(user=other, filename='c.txt', file_url='', file_size=1024)
+        FileAccessLog.objects.create(file=other_file, user=other, access_type='view')
+
+        response = authenticated_client.get(reverse('files:api_access_stats'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['counts'] == {'view': 2, 'download': 0}
+        assert [access['file_name'] for access in response.data['accesses']] == ['b.txt', 'a.txt']
+
+    def test_invalid_cursor(self, authenticated_client):
+        response = authenticated_client.get(reverse('files:api_access_stats'), {'cursor': 'not-a-cursor'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_file_stats_not_found(self, authenticated_client):
+        url = reverse('files:api_file_stats', kwargs={'file_name': 'missing.txt'})
+        assert authenticated_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestFileTableAPI:
+    def test_search_order_and_page(self, authenticated_client, user):
+        for i, size in enumerate([700, 900, 800]):
+            File.objects.create(user=user, filename=f'notes{i}.txt', file_url='', file_size=size)
+        File.objects.create(user=user, filename='other.txt', file_url='', file_size=1000)
+
+        response = authenticated_client.get(reverse('files:api_file_table'), {
+            'draw': 3, 'start': 1, 'length': 1, 'search[value]': 'notes',
+            'order[0][column]': 1, 'order[0][dir]': 'asc',
+        })
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['draw'] == 3
+        assert response.data['recordsTotal'] == 4
+        assert response.data['recordsFiltered'] == 3
+        assert [row['name'] for row in response.data['data']] == ['notes2.txt']
+
+    def test_page_renders_first_page_only(self, client, user):
+        for i in range(7):
+            File.objects.create(user=user, filename=f'test{i}.txt', file_url='', file_size=1024)
+        client.force_login(user)
+        response = client.get(reverse('files:index'))
+        assert response.status_code == status.HTTP_200_OK
+        assert [file['filename'] for file in response.context['files']] == [f'test{i}.txt' for i in range(6, 1, -1)]
+        assert response.context['total_files'] == 7
+
+
+@pytest.fixture
+def cached_file_lists(settings):
+    settings.CACHES = {**settings.CACHES, 'file_lists': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-file-lists'}}
+    yield
+    file_list_cache.cache.clear()
+
+
+class TestCacheStatsAPI:
+    def test_staff_only(self, authenticated_client):
+        assert authenticated_client.get(reverse('files:api_cache_stats')).status_code == status.HTTP_403_FORBIDDEN
+
+    def test_reports_caches_and_s3_clients(self, api_client, user):
+        user.is_staff = True
+        user.save()
+        api_client.force_authenticate(user=user)
+        response = api_client.get(reverse('files:api_cache_stats'))
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data) == {'content_cache', 'file_list_cache', 's3_clients'}
+        assert {'lookups', 'clients_created', 'clients'} <= set(response.data['s3_clients'])
+
+
+class TestFileListCache:
+    def test_repeated_listing_needs_no_query(self, authenticated_client, user, cached_file_lists, django_assert_num_queries, django_capture_on_commit_callbacks):
+        url = reverse('files:api_file_list')
+        with django_capture_on_commit_callbacks(execute=True):
+            File.objects.create(user=user, filename='test1.txt', file_url='', file_size=1024)
+        assert len(authenticated_client.get(url).data['files']) == 1
+        hits = file_list_cache.hits
+        with django_assert_num_queries(0):
+            response = authenticated_client.get(url)
+        assert len(response.data['files']) == 1
+        assert file_list_cache.hits == hits + 1
+
+    def test_changes_bump_the_version(self, authenticated_client, user, cached_file_lists, django_capture_on_commit_callbacks):
+        url = reverse('files:api_file_list')
+        with django_capture_on_commit_callbacks(execute=True):
+            first = File.objects.create(user=user, filename='test1.txt', file_url='', file_size=1024)
+        assert len(authenticated_client.get(url).data['files']) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            File.objects.create(user=user, filename='pending.txt', file_url='', file_size=1024, status=File.STATUS_PENDING)
+        assert file_list_cache.get_version(user.pk) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            File.objects.create(user=user, filename='test2.txt', file_url='', file_size=1024)
+        assert len(authenticated_client.get(url).data['files']) == 2
+
+        with django_capture_on_commit_callbacks(execute=True):
+            first.delete()
+        assert [file['filename'] for file in authenticated_client.get(url).data['files']] == ['test2.txt']
+
+    def test_deleting_users_creates_no_version_rows(self, user, cached_file_lists, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            File.objects.create(user=user, filename='test.txt', file_url='', file_size=1024)
+        User.objects.filter(pk=user.pk).delete()
+        assert not FileListVersion.objects.filter(user_id=user.pk).exists()
+
+
+class TestFileSearchAPI:
+    def test_substring_and_prefix_search(self, authenticated_client, user):
+        for filename in ('Report 2024.txt', 'annual report.txt', 'notes.txt'):
+            File.objects.create(user=user, filename=filename, file_url='', file_size=1024)
+        File.objects.create(user=user, filename='report draft.txt', file_url='', file_size=1024, status=File.STATUS_PENDING)
+        other = User.objects.create_user(username='other', password='password')
+        File.objects.create(user=other, filename='report.txt', file_url='', file_size=1024)
+        assert FileNameTrigram.objects.filter(file__filename='notes.txt').count() == 7
+
+        url = reverse('files:api_file_search')
+        response = authenticated_client.get(url, {'q': 'REPORT'})
+        assert response.status_code == status.HTTP_200_OK
+        assert {file['filename'] for file in response.data['files']} == {'annual report.txt', 'Report 2024.txt'}
+
+        response = authenticated_client.get(url, {'q': 'rep', 'mode': 'prefix'})
+        assert [file['filename'] for file in response.data['files']] == ['Report 2024.txt']
+
+        assert authenticated_client.get(url, {'q': 're'}).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_batch_upload_indexes_names(self, authenticated_client, user, s3_bucket):
+        files = [SimpleUploadedFile(f"batch{i}.txt", b'a' * 1024, content_type="text/plain") for i in range(2)]
+        response = authenticated_client.post(reverse('files:api_file_batch_upload'), {'files': files}, format='multipart')
+        assert response.status_code == status.HTTP_201_CREATED
+        response = authenticated_client.get(reverse('files:api_file_search'), {'q': 'tch1'})
+        assert [file['filename'] for file in response.data['files']] == ['batch1.txt']
@@ -0,0 +1,155 @@
+import gzip
+
+import boto3
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from moto import mock_s3
+
+from files.content_cache import content_cache
+from files.models import File, FileAccessLog
+from files.storage import get_object_key
+from files.views import get_file_etag
+
+
+@pytest.fixture(autouse=True)
+def empty_content_cache():
+    content_cache.clear()
+
+
+@pytest.fixture
+def s3_bucket():
+    with mock_s3():
+        s3 = boto3.client('s3', region_name=settings.AWS_REGION_NAME)
+        s3.create_bucket(
+            Bucket=settings.AWS_BUCKET_NAME,
+            CreateBucketConfiguration={'LocationConstraint': settings.AWS_REGION_NAME}
+        )
+        yield s3
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='testuser', email='test@example.com', password='password')
+
+
+@pytest.fixture
+def client(async_client, user):
+    async_client.force_login(user)
+    return async_client
+
+
+def upload(client, content, name='test.txt'):
+    url = reverse('files:api_async_file_upload')
+    return async_to_sync(client.post)(url, {'file': SimpleUploadedFile(name, content, content_type='text/plain')})
+
+
+def stream(response):
+    async def consume():
+        return b''.join([chunk async for chunk in response.streaming_content])
+    return async_to_sync(consume)()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncFileViews:
+    def test_upload_and_read_back(self, client, user, s3_bucket):
+        content = b''.join(f'line {number}\n'.encode() for number in range(100))
+        response = upload(client, content)
+        assert response.status_code == 201
+
+        file_record = File.objects.available().get(user=user, filename='test.txt')
+        assert file_record.blob.has_line_index
+        s3_object = s3_bucket.get_object(Bucket=settings.AWS_BUCKET_NAME, Key=get_object_key(file_record))
+        assert s3_object['Body'].read() == content
+
+        response = async_to_sync(client.get)(reverse('files:api_async_file_download', kwargs={'file_name': 'test.txt'}))
+        assert response.status_code == 200
+        assert response['Content-Length'] == str(len(content))
+        assert stream(response) == content
+
+        url = reverse('files:api_async_file_content', kwargs={'file_name': 'test.txt'})
+        assert async_to_sync(client.get)(url).json()['content'] == content.decode()
+        page = async_to_sync(client.get)(url, {'offset': 10, 'limit': 2}).json()
+        assert page['content'] == 'line 10\nline 11\n'
+        assert page['total_lines'] == 100
+
+        response = async_to_sync(client.get)(reverse('files:api_async_file_list'))
+        assert [file['filename'] for file in response.json()['files']] == ['test.txt']
+        etag = response['ETag']
+        response = async_to_sync(client.get)(reverse('files:api_async_file_list'), headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert FileAccessLog.objects.filter(user=user).count() == 3
+
+    def test_upload_rejects_binary_content(self, client, user, s3_bucket):
+        response = upload(client, b'a' * 1000 + b'\x00' * 24)
+        assert response.status_code == 400
+        assert response.json()['error'] == 'The file content must be plain text.'
+        assert not File.objects.filter(user=user).exists()
+
+    def test_upload_too_large(self, client, user, s3_bucket, monkeypatch):
+        monkeypatch.setattr('files.async_views.FILE_UPLOAD_MAX_SIZE', 2048)
+        # Refused while parsing, before the checks that would reject the name.
+        response = upload(client, b'a' * 4096, name='big.log')
+        assert response.status_code == 400
+        assert response.json()['error'] == 'File size exceeds 2KB limit.'
+        assert not File.objects.filter(user=user).exists()
+
+    def test_upload_checks_csrf(self, user, s3_bucket):
+        client = AsyncClient(enforce_csrf_checks=True)
+        client.force_login(user)
+        response = upload(client, b'a' * 1024)
+        assert response.status_code == 403
+        assert response.json()['detail'].startswith('CSRF Failed')
+
+    def test_download_range_and_compressed_passthrough(self, client, user, s3_bucket, monkeypatch):
+        content = b'a' * 600 + b'b' * 424
+        upload(client, content)
+        url = reverse('files:api_async_file_download', kwargs={'file_name': 'test.txt'})
+        response = async_to_sync(client.get)(url, headers={'Range': 'bytes=598-601'})
+        assert response.status_code == 206
+        assert stream(response) == b'aabb'
+
+        monkeypatch.setattr('files.async_views.FILE_STORAGE_CODEC', 'gzip')
+        packed = b'c' * 1024
+        upload(client, packed, name='packed.txt')
+        url = reverse('files:api_async_file_download', kwargs={'file_name': 'packed.txt'})
+        response = async_to_sync(client.get)(url, headers={'Accept-Encoding': 'gzip'})
+        assert response['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(stream(response)) == packed
+        assert stream(async_to_sync(client.get)(url)) == packed
+
+    def test_download_fills_content_cache(self, client, user, s3_bucket):
+        content = b''.join(f'line {number}\n'.encode() for number in range(100))
+        upload(client, content)
+        content_cache.clear()
+        response = async_to_sync(client.get)(reverse('files:api_async_file_download', kwargs={'file_name': 'test.txt'}))
+        assert stream(response) == content
+
+        file_record = File.objects.available().select_related('blob').get(user=user, filename='test.txt')
+        assert content_cache.get(get_object_key(file_record), get_file_etag(file_record)) == content
+
+    def test_download_multiple_ranges(self, client, user, s3_bucket):
+        content = bytes(range(48, 123)) * 20
+        upload(client, content)
+        url = reverse('files:api_async_file_download', kwargs={'file_name': 'test.txt'})
+        response = async_to_sync(client.get)(url, headers={'Range': 'bytes=0-4, 100-109'})
+        assert response.status_code == 206
+        content_type, boundary = response['Content-Type'].split('; boundary=')
+        assert content_type == 'multipart/byteranges'
+        body = stream(response)
+        assert response['Content-Length'] == str(len(body))
+        assert body == (
+            f'--{boundary}\r\nContent-Type: text/plain\r\nContent-Range: bytes 0-4/{len(content)}\r\n\r\n'.encode()
+            + content[0:5] + b'\r\n'
+            + f'--{boundary}\r\nContent-Type: text/plain\r\nContent-Range: bytes 100-109/{len(content)}\r\n\r\n'.encode()
+            + content[100:110] + b'\r\n'
+            + f'--{boundary}--\r\n'.encode()
+        )
+
+    def test_unauthenticated(self, async_client, db):
+        response = async_to_sync(async_client.get)(reverse('files:api_async_file_list'))
+        assert response.status_code == 403
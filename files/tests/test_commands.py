@@ -0,0 +1,216 @@
+import io
+import pytest
+import boto3
+import importlib
+
+from datetime import timedelta
+
+from moto import mock_s3
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.utils import timezone
+
+from files.models import Blob, File, FileAccessLog, FileAccessRollup, FileNameTrigram, UploadSession
+from files.blobs import release_blob
+from files.management.commands.compact_access_logs import Command as CompactAccessLogs
+from files.storage import get_blob_key, get_file_key, get_object_url, get_upload_session_path
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='testuser', email='test@example.com', password='password')
+
+
+@pytest.fixture
+def s3_bucket():
+    with mock_s3():
+        s3 = boto3.client('s3', region_name=settings.AWS_REGION_NAME)
+        s3.create_bucket(
+            Bucket=settings.AWS_BUCKET_NAME,
+            CreateBucketConfiguration={'LocationConstraint': settings.AWS_REGION_NAME}
+        )
+        yield s3
+
+
+class TestReapPendingUploads:
+    def test_reaps_abandoned_uploads(self, user, s3_bucket):
+        started = timezone.now() - timedelta(hours=2)
+        pending = File.objects.create(
+            user=user, filename='pending.txt', file_url='', file_size=1024,
+            status=File.STATUS_PENDING
+        )
+        File.objects.create(
+            user=user, filename='fresh.txt', file_url='', file_size=1024,
+            status=File.STATUS_PENDING
+        )
+        available = File.objects.create(user=user, filename='available.txt', file_url='', file_size=1024)
+        File.objects.filter(pk__in=[pending.pk, available.pk]).update(upload_timestamp=started)
+        s3_bucket.put_object(Bucket=settings.AWS_BUCKET_NAME, Key='staging/abandoned', Body=b'a')
+
+        call_command('reap_pending_uploads', older_than=3600)
+
+        assert not File.objects.filter(pk=pending.pk).exists()
+        assert File.objects.filter(filename='fresh.txt').exists()
+        assert File.objects.filter(pk=available.pk).exists()
+        keys = [obj['Key'] for obj in s3_bucket.list_objects_v2(Bucket=settings.AWS_BUCKET_NAME).get('Contents', [])]
+        assert keys == ['staging/abandoned']  # staged a moment ago, so not yet abandoned
+
+        call_command('reap_pending_uploads', older_than=-60)
+        assert 'Contents' not in s3_bucket.list_objects_v2(Bucket=settings.AWS_BUCKET_NAME)
+
+
+class TestExpireUploadSessions:
+    def test_expires_idle_sessions(self, user, settings, tmp_path):
+        settings.UPLOAD_SESSION_DIR = str(tmp_path)
+        idle = UploadSession.objects.create(user=user, filename='idle.txt', size=1024)
+        active = UploadSession.objects.create(user=user, filename='active.txt', size=1024)
+        UploadSession.objects.filter(pk=idle.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        get_upload_session_path(idle.id).touch()
+
+        call_command('expire_upload_sessions')
+
+        assert not UploadSession.objects.filter(pk=idle.pk).exists()
+        assert UploadSession.objects.filter(pk=active.pk).exists()
+        assert not get_upload_session_path(idle.id).exists()
+
+
+class TestGcBlobs:
+    def test_deletes_unreferenced_blobs(self, user, s3_bucket):
+        stale = Blob.objects.create(sha256='a' * 64, size=1, ref_count=0, last_referenced=timezone.now() - timedelta(days=2))
+        fresh = Blob.objects.create(sha256='b' * 64, size=1, ref_count=0)
+        used = Blob.objects.create(sha256='c' * 64, size=1, ref_count=1, last_referenced=timezone.now() - timedelta(days=2))
+        for blob in (stale, fresh, used):
+            s3_bucket.put_object(Bucket=settings.AWS_BUCKET_NAME, Key=get_blob_key(blob.sha256), Body=b'a')
+
+        call_command('gc_blobs')
+
+        assert set(Blob.objects.values_list('pk', flat=True)) == {fresh.pk, used.pk}
+        keys = {obj['Key'] for obj in s3_bucket.list_objects_v2(Bucket=settings.AWS_BUCKET_NAME)['Contents']}
+        assert keys == {get_blob_key(fresh.sha256), get_blob_key(used.sha256)}
+
+    def test_keeps_blobs_released_just_now(self, user, s3_bucket):
+        blob = Blob.objects.create(sha256='a' * 64, size=1, ref_count=1, last_referenced=timezone.now() - timedelta(days=2))
+        s3_bucket.put_object(Bucket=settings.AWS_BUCKET_NAME, Key=get_blob_key(blob.sha256), Body=b'a')
+
+        release_blob(blob.pk)
+        call_command('gc_blobs')
+
+        assert Blob.objects.filter(pk=blob.pk, ref_count=0).exists()
+
+
+class TestCompactAccessLogs:
+    def test_rolls_up_old_rows_per_day(self, user):
+        file = File.objects.create(user=user, filename='test.txt', file_url='', file_size=1024)
+        old = timezone.now() - timedelta(days=40)
+        for access_type, timestamp in [('view', old), ('view', old), ('download', old), ('view', timezone.now())]:
+            FileAccessLog.objects.create(file=file, user=user, access_type=access_type, access_timestamp=timestamp)
+        FileAccessRollup.objects.create(file=file, user=user, day=timezone.localdate(old), access_type='view', count=3)
+
+        call_command('compact_access_logs', retention_days=30, batch_size=2)
+
+        assert list(FileAccessLog.objects.values_list('access_type', flat=True)) == ['view']
+        counts = dict(FileAccessRollup.objects.values_list('access_type', 'count'))
+        assert counts == {'view': 5, 'download': 1}
+
+    def test_retries_a_batch_that_lost_a_race(self, user, monkeypatch):
+        file = File.objects.create(user=user, filename='test.txt', file_url='', file_size=1024)
+        FileAccessLog.objects.create(file=file, user=user, access_type='view', access_timestamp=timezone.now() - timedelta(days=40))
+        compact_batch = CompactAccessLogs.compact_batch
+        calls = []
+
+        def racing_compact_batch(self, cutoff, batch_size):
+            calls.append(batch_size)
+            if len(calls) == 1:
+                # Another run created the same rollup first.
+                raise IntegrityError("UNIQUE constraint failed")
+            return compact_batch(self, cutoff, batch_size)
+
+        monkeypatch.setattr(CompactAccessLogs, 'compact_batch', racing_compact_batch)
+        call_command('compact_access_logs', retention_days=30)
+
+        assert not FileAccessLog.objects.exists()
+        assert FileAccessRollup.objects.get().count == 1
+
+
+class TestIndexFilenames:
+    def test_backfills_missing_trigrams(self, user):
+        File.objects.create(user=user, filename='abcd.txt', file_url='', file_size=1024)
+        FileNameTrigram.objects.all().delete()
+
+        call_command('index_filenames', batch_size=1)
+        call_command('index_filenames')
+
+        assert set(FileNameTrigram.objects.values_list('trigram', flat=True)) == {'abc', 'bcd', 'cd.', 'd.t', '.tx', 'txt'}
+
+
+class TestRenameDuplicateFilenamesMigration:
+    @pytest.fixture
+    def without_unique_filenames(self, transactional_db):
+        """Drop the unique filename constraint, so rows can be as they were before migration 0003."""
+        constraint = File._meta.constraints[0]
+        # SQLite rebuilds the table from the model's constraints, so hide it from them meanwhile.
+        File._meta.constraints = []
+        try:
+            with connection.schema_editor() as editor:
+                editor.remove_constraint(File, constraint)
+        finally:
+            File._meta.constraints = [constraint]
+        yield
+        File.objects.all().delete()
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, File._meta.db_table)
+        if constraint.name not in constraints:
+            with connection.schema_editor() as editor:
+                editor.add_constraint(File, constraint)
+
+    def migrate(self):
+        migration = importlib.import_module('files.migrations.0003_file_unique_user_filename')
+        migration.rename_duplicate_filenames(apps, None)
+        # Fails if the database still considers two of a user's names equal.
+        with connection.schema_editor() as editor:
+            editor.add_constraint(File, File._meta.constraints[0])
+
+    def test_merges_exact_duplicates(self, user, without_unique_filenames):
+        older = File.objects.create(user=user, filename='report.txt', file_url='', file_size=1024)
+        newer = File.objects.create(user=user, filename='report.txt', file_url='', file_size=1024)
+        FileAccessLog.objects.create(file=older, user=user, access_type='download')
+
+        self.migrate()
+
+        assert list(File.objects.filter(user=user).values_list('id', flat=True)) == [newer.id]
+        assert FileAccessLog.objects.get().file_id == newer.id
+
+    @pytest.mark.skipif(connection.vendor != 'mysql', reason="needs MySQL's case- and accent-insensitive collation")
+    def test_renames_names_the_collation_considers_equal(self, user, without_unique_filenames):
+        older = File.objects.create(user=user, filename='Résumé.txt', file_url='', file_size=1024)
+        newer = File.objects.create(user=user, filename='resume.txt', file_url='', file_size=1024)
+        File.objects.create(user=user, filename='RESUME (1).txt', file_url='', file_size=1024)
+
+        self.migrate()
+
+        older.refresh_from_db()
+        newer.refresh_from_db()
+        assert newer.filename == 'resume.txt'
+        assert older.filename == 'Résumé (2).txt'
+
+
+class TestCopyRenamedObjects:
+    def test_copies_objects_to_the_new_name(self, user, s3_bucket):
+        old_key = get_file_key(user.id, 'Report.txt')
+        new_key = get_file_key(user.id, 'Report (2).txt')
+        s3_bucket.put_object(Bucket=settings.AWS_BUCKET_NAME, Key=old_key, Body=b'old')
+        renamed = File.objects.create(user=user, filename='Report (2).txt', file_url=get_object_url(old_key), file_size=3)
+        File.objects.create(user=user, filename='other.txt', file_url=get_object_url(get_file_key(user.id, 'other.txt')), file_size=3)
+
+        call_command('copy_renamed_objects')
+
+        renamed.refresh_from_db()
+        assert renamed.file_url == get_object_url(new_key)
+        assert s3_bucket.get_object(Bucket=settings.AWS_BUCKET_NAME, Key=new_key)['Body'].read() == b'old'
+        out = io.StringIO()
+        call_command('copy_renamed_objects', stdout=out)
+        assert out.getvalue().strip() == "Copied 0 renamed objects."
+
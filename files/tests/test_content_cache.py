@@ -0,0 +1,43 @@
+from files.content_cache import ContentCache
+
+
+class TestContentCache:
+    def test_hit_and_miss(self):
+        cache = ContentCache(max_bytes=100, max_item_bytes=50)
+        assert cache.get('key', '"a"') is None
+        cache.set('key', '"a"', b'x' * 10)
+
+        assert cache.get('key', '"a"') == b'x' * 10
+        assert cache.get('key', '"b"') is None
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 2
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ContentCache(max_bytes=100, max_item_bytes=50)
+        for name in ('a', 'b', 'c'):
+            cache.set(name, '"etag"', b'x' * 40)
+        assert cache.get('a', '"etag"') is None
+        assert cache.stats()['evictions'] == 1
+        assert cache.stats()['bytes'] == 80
+
+        cache.get('b', '"etag"')
+        cache.set('d', '"etag"', b'x' * 40)
+        assert cache.get('b', '"etag"') is not None
+        assert cache.get('c', '"etag"') is None
+
+    def test_large_items_are_not_cached(self):
+        cache = ContentCache(max_bytes=100, max_item_bytes=50)
+        cache.set('key', '"etag"', b'x' * 51)
+        assert cache.get('key', '"etag"') is None
+
+    def test_invalidate_drops_every_version(self):
+        cache = ContentCache(max_bytes=100, max_item_bytes=50)
+        cache.set('key', '"a"', b'x' * 10)
+        cache.set('key', '"b"', b'x' * 10)
+        cache.set('other', '"a"', b'x' * 10)
+        cache.invalidate('key')
+
+        assert cache.get('key', '"a"') is None
+        assert cache.get('key', '"b"') is None
+        assert cache.get('other', '"a"') is not None
+        assert cache.stats()['bytes'] == 10
@@ -61,7 +61,7 @@ class TestFileUploadDownloadIntegration:
         assert download_response.status_code == 200
 
         test_file.seek(0)
-        assert download_response.content == test_file.read()
+        assert b''.join(download_response.streaming_content) == test_file.read()
         assert download_response['Content-Disposition'] == f'attachment; filename="test.txt"'
 
         assert FileAccessLog.objects.filter(file=file_record, user=user, access_type='download').exists()
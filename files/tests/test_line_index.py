@@ -0,0 +1,31 @@
+from files.line_index import LineIndexBuilder, get_line_range, split_lines
+
+
+def build(content, stride, chunk_size=7):
+    builder = LineIndexBuilder(stride)
+    for start in range(0, len(content), chunk_size):
+        builder.feed(content[start:start + chunk_size])
+    return builder.finish()
+
+
+class TestLineIndex:
+    def test_every_stride_line_is_indexed(self):
+        content = b''.join(f'{number}\n'.encode() for number in range(25))
+        index = build(content, stride=10)
+        line_starts = [0] + [position + 1 for position, byte in enumerate(content) if byte == ord('\n')]
+
+        assert index['lines'] == 25
+        assert index['offsets'] == [line_starts[0], line_starts[10], line_starts[20]]
+
+    def test_last_line_without_newline_is_counted(self):
+        assert build(b'a\nb\nc', stride=2)['lines'] == 3
+        assert build(b'a\nb\n', stride=2) == {'stride': 2, 'lines': 2, 'size': 4, 'offsets': [0]}
+        assert build(b'', stride=2)['lines'] == 0
+
+    def test_line_ranges_read_whole_lines(self):
+        content = b''.join(f'line {number}\n'.encode() for number in range(50))
+        index = build(content, stride=8)
+        for offset, limit in ((0, 1), (7, 2), (8, 8), (13, 30), (45, 10)):
+            start, end, skip = get_line_range(index, offset, limit)
+            assert split_lines(content[start:end])[skip:skip + limit] == split_lines(content)[offset:offset + limit]
+        assert get_line_range(index, 50, 10) is None
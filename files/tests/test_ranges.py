@@ -0,0 +1,26 @@
+from files.ranges import parse_range_header
+
+
+class TestParseRangeHeader:
+    def test_single_and_suffix_ranges(self):
+        assert parse_range_header('bytes=0-99', 1000) == [(0, 99)]
+        assert parse_range_header('bytes=900-', 1000) == [(900, 999)]
+        assert parse_range_header('bytes=-100', 1000) == [(900, 999)]
+        assert parse_range_header('bytes=950-2000', 1000) == [(950, 999)]
+
+    def test_multiple_ranges_are_sorted_and_merged(self):
+        assert parse_range_header('bytes=500-599, 0-9, 5-20, 21-30', 1000) == [(0, 30), (500, 599)]
+
+    def test_unsatisfiable_ranges(self):
+        assert parse_range_header('bytes=1000-1100', 1000) == []
+        assert parse_range_header('bytes=-0', 1000) == []
+
+    def test_ignored_headers(self):
+        assert parse_range_header('items=0-9', 1000) is None
+        assert parse_range_header('bytes=abc', 1000) is None
+        assert parse_range_header('bytes=9-0', 1000) is None
+        assert parse_range_header('bytes=' + ','.join(f'{n}-{n}' for n in range(0, 100, 2)), 1000) is None
+
+    def test_malformed_positions_are_ignored(self):
+        for header in ('bytes=--5', 'bytes=+5-', 'bytes=0-+9', 'bytes=0- 9', 'bytes=1_0-20', 'bytes=-', 'bytes=0-9,--5'):
+            assert parse_range_header(header, 1000) is None, header
@@ -1,5 +1,12 @@
+from datetime import datetime, timezone as dt_timezone
+
 from django.test import TestCase
-from files.serializers import FileUploadSerializer
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from files.models import File
+from files.renderers import FastJSONRenderer
+from files.serializers import FileUploadSerializer, FileSerializer, serialize_rows
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 
@@ -15,3 +22,25 @@ class FileUploadSerializerTest(TestCase):
         serializer = FileUploadSerializer(data=data)
         self.assertFalse(serializer.is_valid())
         self.assertIn('file', serializer.errors)
+
+
+class SerializeRowsTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='testuser', password='password')
+        File.objects.create(user=user, filename='caf\u00e9 \u2028 "q".txt', file_url='http://example.com/a', file_size=1024, is_encrypted=True)
+        second = File.objects.create(user=user, filename='b.txt', file_url='http://example.com/b', file_size=2048)
+        File.objects.filter(pk=second.pk).update(upload_timestamp=datetime(2024, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc))
+        self.files = File.objects.order_by('id')
+
+    def assert_same_output(self):
+        expected = JSONRenderer().render(FileSerializer(self.files, many=True).data)
+        rows = serialize_rows(FileSerializer, self.files.values(*FileSerializer.Meta.fields))
+        self.assertEqual(FastJSONRenderer().render(rows), expected)
+        self.assertEqual(JSONRenderer().render(rows), expected)
+
+    def test_matches_file_serializer(self):
+        self.assert_same_output()
+
+    def test_matches_file_serializer_in_other_timezone(self):
+        with timezone.override('Europe/Istanbul'):
+            self.assert_same_output()
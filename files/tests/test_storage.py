@@ -0,0 +1,47 @@
+import os
+import threading
+
+from files.storage import S3ClientRegistry
+
+
+class TestS3ClientRegistry:
+    def test_client_is_shared(self):
+        registry = S3ClientRegistry()
+        client = registry.get_client()
+
+        assert registry.get_client() is client
+        assert registry.stats()['lookups'] == 2
+        assert registry.stats()['clients_created'] == 1
+        assert registry.stats()['clients'] == 1
+
+    def test_counts_every_lookup_across_threads(self):
+        registry = S3ClientRegistry()
+        registry._create_client = lambda region_name: object()
+
+        def look_up():
+            for _ in range(1000):
+                registry.get_client()
+
+        threads = [threading.Thread(target=look_up) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert registry.stats()['lookups'] == 8000
+        assert registry.stats()['clients_created'] == 1
+
+    def test_client_is_rebuilt_after_fork(self):
+        registry = S3ClientRegistry()
+        client = registry.get_client()
+        registry._pid = os.getpid() + 1  # as seen from a forked worker
+
+        assert registry.get_client() is not client
+        assert registry.stats()['clients_created'] == 2
+
+    def test_pool_size_is_configured(self, settings):
+        settings.S3_MAX_POOL_CONNECTIONS = 7
+        client = S3ClientRegistry().get_client()
+
+        assert client.meta.config.max_pool_connections == 7
+        assert client.meta.config.tcp_keepalive is True
@@ -0,0 +1,102 @@
+import gzip
+import random
+import pytest
+import boto3
+from moto import mock_s3
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, StopFutureHandlers
+
+from files.upload_handlers import S3MultipartUploadHandler
+
+
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def s3_bucket():
+    with mock_s3():
+        s3 = boto3.client('s3', region_name=settings.AWS_REGION_NAME)
+        s3.create_bucket(
+            Bucket=settings.AWS_BUCKET_NAME,
+            CreateBucketConfiguration={'LocationConstraint': settings.AWS_REGION_NAME}
+        )
+        yield s3
+
+
+def make_handler(s3, max_size=None, codec='', validate_text=False):
+    return S3MultipartUploadHandler(
+        s3_client=s3,
+        bucket=settings.AWS_BUCKET_NAME,
+        key_prefix='staging/',
+        max_size=max_size,
+        part_size=PART_SIZE,
+        codec=codec,
+        validate_text=validate_text,
+    )
+
+
+def feed(handler, content, chunk_size=64 * 1024):
+    with pytest.raises(StopFutureHandlers):
+        handler.new_file('file', 'test.txt', 'text/plain', len(content))
+    for start in range(0, len(content), chunk_size):
+        handler.receive_data_chunk(content[start:start + chunk_size], start)
+    return handler.file_complete(len(content))
+
+
+class TestS3MultipartUploadHandler:
+    def test_small_file_is_kept_in_memory(self, s3_bucket):
+        uploaded_file = feed(make_handler(s3_bucket), b'a' * 1024)
+        assert not uploaded_file.is_staged
+        assert uploaded_file.read() == b'a' * 1024
+        assert 'Contents' not in s3_bucket.list_objects_v2(Bucket=settings.AWS_BUCKET_NAME)
+
+    def test_large_file_is_streamed_as_multipart(self, s3_bucket):
+        content = b'abcdefghij' * (PART_SIZE // 4)
+        handler = make_handler(s3_bucket)
+        uploaded_file = feed(handler, content)
+
+        assert uploaded_file.is_staged
+        assert uploaded_file.staged_key.startswith('staging/')
+        assert uploaded_file.size == len(content)
+        assert uploaded_file.read() == content[:handler.head_size]
+        s3_object = s3_bucket.get_object(Bucket=settings.AWS_BUCKET_NAME, Key=uploaded_file.staged_key)
+        assert s3_object['Body'].read() == content
+
+    def test_large_file_is_compressed_while_streaming(self, s3_bucket):
+        # Incompressible content, so the compressed stream still spans several parts.
+        content = random.Random(0).randbytes(PART_SIZE * 2)
+        uploaded_file = feed(make_handler(s3_bucket, codec='gzip'), content)
+
+        assert uploaded_file.is_staged
+        assert uploaded_file.codec == 'gzip'
+        assert uploaded_file.size == len(content)
+        s3_object = s3_bucket.get_object(Bucket=settings.AWS_BUCKET_NAME, Key=uploaded_file.staged_key)
+        stored = s3_object['Body'].read()
+        assert s3_object['ContentEncoding'] == 'gzip'
+        assert uploaded_file.stored_size == len(stored)
+        assert gzip.decompress(stored) == content
+
+    def test_invalid_text_aborts_the_upload(self, s3_bucket):
+        content = b'a' * PART_SIZE * 2 + b'\x00' + b'a' * 1024
+        uploaded_file = feed(make_handler(s3_bucket, validate_text=True), content)
+
+        assert uploaded_file.is_text is False
+        assert not uploaded_file.is_staged
+        uploads = s3_bucket.list_multipart_uploads(Bucket=settings.AWS_BUCKET_NAME)
+        assert not uploads.get('Uploads')
+
+    def test_truncated_character_is_invalid_text(self, s3_bucket):
+        uploaded_file = feed(make_handler(s3_bucket, validate_text=True), 'é'.encode() * 600 + b'\xc3')
+        assert uploaded_file.is_text is False
+
+        uploaded_file = feed(make_handler(s3_bucket, validate_text=True), 'é'.encode() * 600, chunk_size=777)
+        assert uploaded_file.is_text is True
+
+    def test_oversized_file_is_aborted(self, s3_bucket):
+        handler = make_handler(s3_bucket, max_size=PART_SIZE + 1024)
+        with pytest.raises(SkipFile):
+            feed(handler, b'a' * (PART_SIZE * 2))
+
+        assert handler.oversized_files == ['test.txt']
+        uploads = s3_bucket.list_multipart_uploads(Bucket=settings.AWS_BUCKET_NAME)
+        assert not uploads.get('Uploads')
@@ -0,0 +1,258 @@
+import io
+import uuid
+import hashlib
+import logging
+
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopFutureHandlers
+
+from botocore.exceptions import ClientError
+
+from .compression import get_compressor
+from .line_index import LineIndexBuilder
+from .validators import TextValidator
+
+
+logger = logging.getLogger(__name__)
+
+
+class S3UploadedFile(UploadedFile):
+    """
+    An uploaded file whose bytes were streamed to S3 while the request was parsed.
+
+    Files that fit in a single part are kept in memory as ``stored_content`` and
+    ``staged_key`` is None, so the caller can write them with one ``put_object``.
+    Larger files were sent as a multipart upload to ``staged_key``. Either way
+    the stored bytes are compressed with ``codec`` and the file itself only
+    reads back the first bytes of the original content. ``sha256`` is the digest
+    of the whole original content and ``is_text`` whether all of it is valid
+    text, when they are already known, and ``line_index`` its line index.
+    """
+
+    def __init__(self, file, name, content_type, size, charset, staged_key=None, sha256=None, is_text=None,
+                 line_index=None, codec='', stored_size=None, stored_content=None, content_type_extra=None):
+        super().__init__(file, name, content_type, size, charset, content_type_extra)
+        self.staged_key = staged_key
+        self.sha256 = sha256
+        self.is_text = is_text
+        self.line_index = line_index
+        self.codec = codec
+        self.stored_size = stored_size
+        self.stored_content = stored_content
+
+    @property
+    def is_staged(self):
+        return self.staged_key is not None
+
+
+class MaxSizeUploadHandler(FileUploadHandler):
+    """
+    Upload handler that skips files bigger than ``max_size`` while the request
+    is parsed, before the handlers after it have stored more than that.
+
+    Chunks of other files are passed on unchanged. Names of skipped files are
+    collected in ``oversized_files``.
+    """
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size
+        self.oversized_files = []
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            self.oversized_files.append(self.file_name)
+            raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class S3MultipartUploadHandler(FileUploadHandler):
+    """
+    Upload handler that forwards file chunks into an S3 multipart upload as they arrive.
+
+    At most one part is buffered per file, so memory per request stays constant
+    regardless of file size. The content is hashed, and compressed with ``codec``
+    if one is set, in the same pass. With ``validate_text`` the whole content is
+    also checked to be UTF-8 without null bytes; the transfer of a file that is
+    not is aborted at the first invalid byte and the file comes back with
+    ``is_text`` False. With ``line_index_stride`` a sparse line index of valid
+    text is built as well. Files bigger than ``max_size`` are aborted and their
+    names collected in ``oversized_files``.
+    """
+
+    head_size = 1024
+
+    def __init__(self, request=None, s3_client=None, bucket=None, key_prefix='', max_size=None, part_size=None, extra_args=None, codec='', validate_text=False,
+                 line_index_stride=None):
+        super().__init__(request)
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key_prefix = key_prefix
+        self.max_size = max_size
+        self.part_size = part_size
+        self.extra_args = extra_args or {}
+        self.codec = codec
+        self.validate_text = validate_text
+        self.line_index_stride = line_index_stride
+        self.oversized_files = []
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.buffer = io.BytesIO()
+        self.head = b''
+        self.hasher = hashlib.sha256()
+        self.compressor = get_compressor(self.codec)
+        self.validator = TextValidator() if self.validate_text else None
+        self.line_index = LineIndexBuilder(self.line_index_stride) if self.line_index_stride else None
+        self.received = 0
+        self.stored = 0
+        self.staged_key = None
+        self.upload_id = None
+        self.parts = []
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.max_size is not None and self.received > self.max_size:
+            self.abort()
+            self.oversized_files.append(self.file_name)
+            raise SkipFile()
+
+        if len(self.head) < self.head_size:
+            self.head += raw_data[:self.head_size - len(self.head)]
+
+        if self.validator:
+            if not self.validator.is_valid:
+                return None
+            if not self.validator.feed(raw_data):
+                self.reject()
+                return None
+
+        self.hasher.update(raw_data)
+        if self.line_index:
+            self.line_index.feed(raw_data)
+        self.write(self.compressor.compress(raw_data) if self.compressor else raw_data)
+        return None
+
+    def write(self, data):
+        self.buffer.write(data)
+        self.stored += len(data)
+        if self.buffer.tell() >= self.part_size:
+            self.flush_part()
+
+    def file_complete(self, file_size):
+        if self.validator and not self.validator.finish():
+            self.reject()
+            return S3UploadedFile(
+                file=io.BytesIO(self.head),
+                name=self.file_name,
+                content_type=self.content_type,
+                size=file_size,
+                charset=self.charset,
+                is_text=False,
+                content_type_extra=self.content_type_extra,
+            )
+
+        if self.compressor:
+            self.write(self.compressor.flush())
+
+        if self.upload_id is None:
+            return S3UploadedFile(
+                file=io.BytesIO(self.head),
+                name=self.file_name,
+                content_type=self.content_type,
+                size=file_size,
+                charset=self.charset,
+                sha256=self.hasher.hexdigest(),
+                is_text=True if self.validator else None,
+                line_index=self.line_index.finish() if self.line_index else None,
+                codec=self.codec,
+                stored_size=self.stored,
+                stored_content=self.buffer.getvalue(),
+                content_type_extra=self.content_type_extra,
+            )
+
+        if self.buffer.tell():
+            self.flush_part()
+        try:
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.staged_key,
+                UploadId=self.upload_id,
+                MultipartUpload={"Parts": self.parts},
+            )
+        except ClientError:
+            self.abort()
+            raise
+        self.upload_id = None
+
+        return S3UploadedFile(
+            file=io.BytesIO(self.head),
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            staged_key=self.staged_key,
+            sha256=self.hasher.hexdigest(),
+            is_text=True if self.validator else None,
+            line_index=self.line_index.finish() if self.line_index else None,
+            codec=self.codec,
+            stored_size=self.stored,
+            content_type_extra=self.content_type_extra,
+        )
+
+    def upload_complete(self):
+        # A request that ends mid-file never reaches file_complete().
+        if getattr(self, 'upload_id', None) is not None:
+            self.abort()
+
+    def flush_part(self):
+        """Send the buffered bytes as the next part, starting the multipart upload if needed."""
+        try:
+            if self.upload_id is None:
+                self.staged_key = f"{self.key_prefix}{uuid.uuid4().hex}"
+                extra_args = {**self.extra_args, "ContentEncoding": self.codec} if self.codec else self.extra_args
+                response = self.s3_client.create_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.staged_key,
+                    **extra_args
+                )
+                self.upload_id = response['UploadId']
+
+            part_number = len(self.parts) + 1
+            response = self.s3_client.upload_part(
+                Bucket=self.bucket,
+                Key=self.staged_key,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                Body=self.buffer.getvalue(),
+            )
+        except ClientError:
+            self.abort()
+            raise
+
+        self.parts.append({"ETag": response['ETag'], "PartNumber": part_number})
+        self.buffer = io.BytesIO()
+
+    def reject(self):
+        """Stop storing a file that failed validation; the rest of it is only counted."""
+        self.abort()
+        self.buffer = io.BytesIO()
+
+    def abort(self):
+        """Abort the in-progress multipart upload, if any, so S3 drops its parts."""
+        if self.upload_id is None:
+            return
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.staged_key, UploadId=self.upload_id)
+        except ClientError as e:
+            logger.error(f"Failed to abort multipart upload: {str(e)}")
+        self.upload_id = None
@@ -1,12 +1,34 @@
 from django.urls import path
-from .views import FileUploadAPI, FilesView, FileDownloadAPI, FileListAPI, FileContentAPI
+from .views import (
+    FilesView, FileTableAPI, FileUploadAPI, FileBatchUploadAPI, FilePresignedUploadAPI, FileUploadCompleteAPI,
+    FileUploadSessionAPI, FileUploadSessionDetailAPI, FileUploadSessionCompleteAPI,
+    FileDownloadAPI, FileListAPI, FileContentAPI, FileAccessStatsAPI, UserAccessStatsAPI,
+    FileSearchAPI, CacheStatsAPI
+)
+from .async_views import AsyncFileUploadView, AsyncFileDownloadView, AsyncFileListView, AsyncFileContentView
 
 app_name = 'files'
 
 urlpatterns = [
     path('', FilesView.as_view(template_name='pages/files/index.html'), name='index'),
     path('api/upload/', FileUploadAPI.as_view(), name='api_file_upload'),
+    path('api/upload/batch/', FileBatchUploadAPI.as_view(), name='api_file_batch_upload'),
+    path('api/upload/presign/', FilePresignedUploadAPI.as_view(), name='api_file_presign_upload'),
+    path('api/upload/complete/', FileUploadCompleteAPI.as_view(), name='api_file_upload_complete'),
+    path('api/upload/sessions/', FileUploadSessionAPI.as_view(), name='api_upload_session'),
+    path('api/upload/sessions/<uuid:session_id>/', FileUploadSessionDetailAPI.as_view(), name='api_upload_session_detail'),
+    path('api/upload/sessions/<uuid:session_id>/complete/', FileUploadSessionCompleteAPI.as_view(), name='api_upload_session_complete'),
     path('api/download/<str:file_name>/', FileDownloadAPI.as_view(), name='api_file_download'),
     path('api/files/', FileListAPI.as_view(), name='api_file_list'),
+    path('api/files/table/', FileTableAPI.as_view(), name='api_file_table'),
+    path('api/files/search/', FileSearchAPI.as_view(), name='api_file_search'),
     path('api/file-content/<str:file_name>/', FileContentAPI.as_view(), name='api_file_content'),
+    path('api/files/<str:file_name>/stats/', FileAccessStatsAPI.as_view(), name='api_file_stats'),
+    path('api/stats/', UserAccessStatsAPI.as_view(), name='api_access_stats'),
+    path('api/cache-stats/', CacheStatsAPI.as_view(), name='api_cache_stats'),
+    # Async variants, for deployments served over ASGI.
+    path('api/async/upload/', AsyncFileUploadView.as_view(), name='api_async_file_upload'),
+    path('api/async/download/<str:file_name>/', AsyncFileDownloadView.as_view(), name='api_async_file_download'),
+    path('api/async/files/', AsyncFileListView.as_view(), name='api_async_file_list'),
+    path('api/async/file-content/<str:file_name>/', AsyncFileContentView.as_view(), name='api_async_file_content'),
 ]
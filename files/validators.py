@@ -0,0 +1,47 @@
+import codecs
+import hashlib
+
+
+class TextValidator:
+    """Check incrementally that a byte stream is UTF-8 text without null bytes."""
+
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.is_valid = True
+
+    def feed(self, data, final=False):
+        """Validate the next chunk and return whether everything seen so far is valid."""
+        if not self.is_valid:
+            return False
+        if b'\x00' in data:
+            self.is_valid = False
+            return False
+        try:
+            self.decoder.decode(data, final)
+        except UnicodeDecodeError:
+            self.is_valid = False
+        return self.is_valid
+
+    def finish(self):
+        """Validate the end of the stream, which must not cut a character in half."""
+        return self.feed(b'', final=True)
+
+
+def scan_text(chunks, line_index=None):
+    """
+    Hash and validate a stream of chunks in a single pass, feeding ``line_index`` if given.
+
+    Returns ``(sha256, is_text)``; reading stops at the first invalid byte, in
+    which case the digest is None.
+    """
+    hasher = hashlib.sha256()
+    validator = TextValidator()
+    for chunk in chunks:
+        if not validator.feed(chunk):
+            return None, False
+        hasher.update(chunk)
+        if line_index is not None:
+            line_index.feed(chunk)
+    if not validator.finish():
+        return None, False
+    return hasher.hexdigest(), True
@@ -1,19 +1,30 @@
+import io
 import re
-import boto3
 import os
+import uuid
+import json
 import hashlib
+import fcntl
 import logging
+import itertools
 
-from django.db import transaction  
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Case, CharField, Count, Sum, Value, When
 from django.views.generic import TemplateView
-from django.http import HttpResponse
+from django.template.defaultfilters import date as date_format
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
 from django.conf import settings
 
-from rest_framework.throttling import UserRateThrottle
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.throttling import ScopedRateThrottle, UserRateThrottle
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
@@ -24,8 +35,25 @@ from urllib.parse import unquote
 from file_upload_system.layout_config import LayoutConfig
 from file_upload_system.__init__ import Layout
 
-from .serializers import FileUploadSerializer, FileSerializer
-from .models import File, FileAccessLog  
+from .access_log import access_log
+from .content_cache import content_cache
+from .list_cache import file_list_cache
+from .compression import CompressingReader, accepts_encoding, decompress, iter_decompressed
+from .blobs import acquire_blob, compute_sha256, register_blob, release_blob
+from .storage import (
+    get_s3_client, get_blob_key, get_object_codec, get_object_key,
+    get_object_url, get_line_index_key, get_presigned_download_url,
+    get_upload_session_path, hash_user_id, s3_clients
+)
+from .upload_handlers import S3MultipartUploadHandler, S3UploadedFile
+from .line_index import LineIndexBuilder, get_line_range, split_lines
+from .ranges import content_range, parse_range_header
+from .validators import scan_text
+from .pagination import InvalidCursor, paginate_keyset
+from .renderers import FastJSONRenderer
+from .search import filter_by_substring, index_filenames
+from .serializers import FileUploadSerializer, FileSerializer, FileAccessLogSerializer, serialize_rows
+from .models import File, FileAccessLog, FileAccessRollup, UploadSession
 
 
 logger = logging.getLogger(__name__)
@@ -35,21 +63,45 @@ AWS_REGION_NAME = settings.AWS_REGION_NAME
 AWS_BUCKET_NAME = settings.AWS_BUCKET_NAME
 AWS_ENCRYPTION_TYPE = settings.AWS_ENCRYPTION_TYPE
 AWS_ENCRYPTION_KEY_ID = settings.AWS_ENCRYPTION_KEY_ID
-AWS_ACCESS_KEY = settings.AWS_ACCESS_KEY
-AWS_SECRET_ACCESS_KEY = settings.AWS_SECRET_ACCESS_KEY
-
-def hash_user_id(user_id):
-    """Hash the user ID using SHA-256."""
-    return hashlib.sha256(str(user_id).encode()).hexdigest()
-
-def get_s3_client():
-    """Initialize and return an S3 client."""
-    return boto3.client(
-        's3',
-        aws_access_key_id=AWS_ACCESS_KEY,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-        region_name=AWS_REGION_NAME
-    )
+FILE_UPLOAD_MIN_SIZE = settings.FILE_UPLOAD_MIN_SIZE
+FILE_UPLOAD_MAX_SIZE = settings.FILE_UPLOAD_MAX_SIZE
+S3_MULTIPART_PART_SIZE = settings.S3_MULTIPART_PART_SIZE
+S3_STAGING_PREFIX = settings.S3_STAGING_PREFIX
+FILE_STORAGE_CODEC = settings.FILE_STORAGE_CODEC
+LINE_INDEX_STRIDE = settings.LINE_INDEX_STRIDE
+FILE_UPLOAD_BATCH_MAX_FILES = settings.FILE_UPLOAD_BATCH_MAX_FILES
+FILE_UPLOAD_BATCH_WORKERS = settings.FILE_UPLOAD_BATCH_WORKERS
+PRESIGNED_UPLOAD_EXPIRY = settings.PRESIGNED_UPLOAD_EXPIRY
+FILE_DOWNLOAD_MODE = settings.FILE_DOWNLOAD_MODE
+UNIQUE_FILENAME_ATTEMPTS = 5
+UNIQUE_FILENAME_CANDIDATES = 20
+UPLOAD_SESSION_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+FILE_CONTENT_MAX_LINES = 1000
+FILE_LIST_PAGE_SIZE = settings.FILE_LIST_PAGE_SIZE
+FILE_LIST_MAX_PAGE_SIZE = settings.FILE_LIST_MAX_PAGE_SIZE
+FILE_TABLE_PAGE_SIZE = 5
+FILE_TABLE_DATE_FORMAT = "d M Y, h:i A"  # as rendered by pages/files/index.html
+FILE_SEARCH_MIN_LENGTH = 3  # the length of a trigram
+FILE_SEARCH_PAGE_SIZE = 50
+FILE_SEARCH_MAX_PAGE_SIZE = 100
+ACCESS_HISTORY_PAGE_SIZE = 50
+ACCESS_HISTORY_MAX_PAGE_SIZE = 100
+
+def get_encryption_args():
+    """Return the server-side encryption arguments used for every object we write."""
+    return {
+        "ServerSideEncryption": AWS_ENCRYPTION_TYPE,
+        "SSEKMSKeyId": AWS_ENCRYPTION_KEY_ID
+    }
+
+def get_user_staging_prefix(user_id):
+    """Return the staging prefix clients may upload to directly with a presigned POST."""
+    return f"{S3_STAGING_PREFIX}{hash_user_id(user_id)}/"
+
+def format_size(size):
+    """Format a byte count the way our validation messages do, e.g. 512 -> '0.5KB'."""
+    return f"{size / 1024:g}KB"
 
 def sanitize_filename(filename):
     """Sanitize filename to avoid injection attacks but keep spaces."""
@@ -57,6 +109,133 @@ def sanitize_filename(filename):
     return sanitized.strip()
 
 
+def stream_object(body, codec=''):
+    """Yield an S3 object's content in fixed-size chunks, decompressing it if ``codec`` is set."""
+    try:
+        chunks = body.iter_chunks(DOWNLOAD_CHUNK_SIZE)
+        if codec:
+            chunks = iter_decompressed(chunks, codec)
+        yield from chunks
+    finally:
+        body.close()
+
+
+def get_file_etag(file_record, content_encoding=None):
+    """
+    Return a strong ETag for a File's content, computed from the database row alone.
+
+    Blob-backed files use their content hash; legacy files, whose content never
+    changes after upload, hash their id and upload time instead.
+    """
+    if file_record.blob_id is not None:
+        tag = file_record.blob.sha256
+    else:
+        tag = hashlib.sha256(f"{file_record.pk}:{file_record.upload_timestamp.isoformat()}".encode()).hexdigest()
+    if content_encoding:
+        # The encoded bytes are a different representation, so they need their own tag.
+        tag = f"{tag}-{content_encoding}"
+    return f'"{tag}"'
+
+
+def get_last_modified(file_record):
+    return int(file_record.upload_timestamp.timestamp())
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def conditional_response(request, etag, last_modified=None):
+    """Return a 304 (or 412) if the client's copy is current, otherwise None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def if_range_matches(request, etag, last_modified):
+    """Whether a Range may be honoured: If-Range, when sent, must name the current version."""
+    if_range = request.headers.get('If-Range')
+    if if_range is None:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def get_list_etag(ids, next_cursor):
+    """
+    Return an ETag for a page of the file list from the ids on it and the cursor of the next page.
+
+    Rows are only ever added or removed, and either changes the ids on every
+    page from there on. There is no Last-Modified, since deletions would not
+    move it.
+    """
+    fingerprint = f"{','.join(str(pk) for pk in ids)}:{next_cursor}"
+    return f'"{hashlib.sha256(fingerprint.encode()).hexdigest()}"'
+
+
+def get_page_size(params, default, maximum):
+    """Return the ``limit`` query parameter, or None unless it is an integer between 1 and ``maximum``."""
+    try:
+        limit = int(params.get('limit', default))
+    except ValueError:
+        return None
+    return limit if 1 <= limit <= maximum else None
+
+
+def read_object(s3_client, key, etag):
+    """Return an object's stored bytes from the content cache, fetching and caching them on a miss."""
+    data = content_cache.get(key, etag)
+    if data is None:
+        data = s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=key)['Body'].read()
+        content_cache.set(key, etag, data)
+    return data
+
+
+def count_accesses(logs, rollups):
+    """Count accesses by type, over raw log rows and the daily rollups of compacted ones."""
+    counts = {"view": 0, "download": 0}
+    for row in logs.values('access_type').annotate(count=Count('id')).order_by():
+        counts[row['access_type']] = counts.get(row['access_type'], 0) + row['count']
+    for row in rollups.values('access_type').annotate(count=Sum('count')).order_by():
+        counts[row['access_type']] = counts.get(row['access_type'], 0) + row['count']
+    return counts
+
+
+def make_available(file_record, blob):
+    """Point a pending File at its stored blob and list it; False if the row is no longer pending."""
+    with transaction.atomic():
+        updated = File.objects.pending().filter(pk=file_record.pk).update(
+            status=File.STATUS_AVAILABLE,
+            blob=blob,
+            file_url=get_object_url(get_blob_key(blob.sha256))
+        )
+        if updated:
+            file_list_cache.bump(file_record.user_id)
+    return bool(updated)
+
+
+def get_file_list_page(user, cursor, limit):
+    """
+    Return a page of the user's file list as ``(files, next_cursor, etag)``, from the list cache if possible.
+
+    Raises InvalidCursor for a malformed cursor.
+    """
+    def build():
+        rows, next_cursor = paginate_keyset(
+            File.objects.available().filter(user=user).values(*FileSerializer.Meta.fields),
+            ('upload_timestamp', 'id'), cursor, limit
+        )
+        etag = get_list_etag([row['id'] for row in rows], next_cursor)
+        return serialize_rows(FileSerializer, rows), next_cursor, etag
+
+    return file_list_cache.get(user.pk, f"page:{limit}:{cursor or ''}", build)
+
+
 def handle_file_not_found():
     """Return response for file not found with a generic message."""
     return HttpResponse("File not found or permission denied.", status=404)
@@ -71,145 +250,890 @@ class FilesView(TemplateView):
         context = Layout.init(context)
         LayoutConfig.addJavascriptFile('js/files/list.js')
         LayoutConfig.addVendor('datatables')
-        files = File.objects.filter(user=self.request.user)
-       
+        user = self.request.user
+
+        def build():
+            files = File.objects.available().filter(user=user)
+            first_page = files.order_by('-upload_timestamp', '-id').values('filename', 'file_size', 'upload_timestamp')
+            return list(first_page[:FILE_TABLE_PAGE_SIZE]), files.count()
+
+        # Only the first page is rendered; DataTables fetches the rest from FileTableAPI.
+        files, total_files = file_list_cache.get(user.pk, "table", build)
         context.update({
             "files": files,
+            "total_files": total_files,
+            "page_length": FILE_TABLE_PAGE_SIZE,
         })
         return context
 
 
+class FileTableAPI(APIView):
+    """
+    Serve the files table of FilesView with DataTables server-side processing.
+
+    Search, ordering and paging all happen in the database, so a request only
+    reads the rows it shows.
+    """
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'file_table'
+    permission_classes = [IsAuthenticated]
+
+    # DataTables column index -> model field.
+    ORDER_FIELDS = {0: 'filename', 1: 'file_size', 2: 'upload_timestamp'}
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        try:
+            draw = int(params.get('draw', 0))
+            start = int(params.get('start', 0))
+            length = int(params.get('length', FILE_TABLE_PAGE_SIZE))
+        except ValueError:
+            return Response({"error": "draw, start and length must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        if start < 0 or not 1 <= length <= FILE_LIST_MAX_PAGE_SIZE:
+            return Response({"error": f"start must not be negative and length must be between 1 and {FILE_LIST_MAX_PAGE_SIZE}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        files = File.objects.available().filter(user=request.user)
+        total = files.count()
+        search = params.get('search[value]', '').strip()
+        if search:
+            files = filter_by_substring(files, request.user, search)
+            filtered = files.count()
+        else:
+            filtered = total
+
+        try:
+            field = self.ORDER_FIELDS[int(params.get('order[0][column]', 2))]
+        except (KeyError, ValueError):
+            field = 'upload_timestamp'
+        prefix = '' if params.get('order[0][dir]') == 'asc' else '-'
+        page = files.order_by(f'{prefix}{field}', f'{prefix}id')[start:start + length]
+
+        return Response({
+            "draw": draw,
+            "recordsTotal": total,
+            "recordsFiltered": filtered,
+            "data": [
+                {
+                    "name": file_record.filename,
+                    "size": file_record.file_size,
+                    "date": date_format(timezone.localtime(file_record.upload_timestamp), FILE_TABLE_DATE_FORMAT),
+                }
+                for file_record in page
+            ],
+        }, status=200)
+
+
 class FileUploadAPI(APIView):
     throttle_classes = [UserRateThrottle]
     permission_classes = [IsAuthenticated]
 
     def is_text_file(self, file):
-        """Check if the file contains only text characters by verifying UTF-8 encoding and excluding null bytes."""
-        try:
-            sample = file.read(1024)
-            file.seek(0)
+        """Check if the whole file is valid UTF-8 without null bytes, scanning it only if the upload handler did not."""
+        if file.is_text is None:
+            line_index = LineIndexBuilder(LINE_INDEX_STRIDE)
+            file.sha256, file.is_text = self.scan_content(file, line_index)
+            if file.is_text:
+                file.line_index = line_index.finish()
+        return file.is_text
 
-            if b'\x00' in sample:
-                return False
+    def scan_content(self, uploaded_file, line_index):
+        """Hash, validate and line-index an upload's content in one pass, returning ``(sha256, is_text)``."""
+        try:
+            return scan_text(uploaded_file.chunks(), line_index)
+        finally:
+            uploaded_file.seek(0)
 
-            sample.decode('utf-8')
-            return True
-        except UnicodeDecodeError:
-            return False
 
+    def generate_unique_filename(self, user, filename, reserved=()):
+        """
+        Generate a unique sanitized filename by appending the lowest free " (n)" suffix, usually in a single query.
 
-    def generate_unique_filename(self, user, filename):
-        """Generate a unique sanitized filename by appending a number if it already exists."""
+        Names are compared by the database, case-insensitively and under MySQL
+        also accent-insensitively, like the unique index. ``reserved`` holds
+        lowercased names already claimed but not yet in the database.
+        """
         sanitized_filename = sanitize_filename(filename)
         base, extension = os.path.splitext(sanitized_filename)
-        counter = 1
-        new_filename = sanitized_filename
 
-        while File.objects.filter(user=user, filename=new_filename).exists():
-            new_filename = f"{base} ({counter}){extension}"
-            counter += 1
+        for first in itertools.count(0, UNIQUE_FILENAME_CANDIDATES):
+            candidates = [
+                f"{base} ({counter}){extension}" if counter else sanitized_filename
+                for counter in range(first, first + UNIQUE_FILENAME_CANDIDATES)
+            ]
+            # iexact is a LIKE under MySQL, so it follows the column's case- and accent-insensitive collation.
+            taken = set(
+                File.objects.filter(user=user, filename__istartswith=base, filename__iendswith=extension)
+                .annotate(slot=Case(
+                    *[When(filename__iexact=candidate, then=Value(slot)) for slot, candidate in enumerate(candidates)],
+                    output_field=BigIntegerField()
+                ))
+                .values_list('slot', flat=True)
+            )
+            for slot, candidate in enumerate(candidates):
+                if slot not in taken and candidate.lower() not in reserved:
+                    return candidate
+
+    def reserve_file(self, user, uploaded_file):
+        """
+        Insert a pending File row under a unique name, or return None if none could be reserved.
+
+        The unique index makes a concurrent upload that picked the same name fail
+        here and retry, before anything is written to S3. A rejected name is not
+        tried again, in case the index considers it taken although the lookup did not.
+        """
+        rejected = set()
+        for _ in range(UNIQUE_FILENAME_ATTEMPTS):
+            unique_filename = self.generate_unique_filename(user, uploaded_file.name, rejected)
+            try:
+                with transaction.atomic():
+                    file_record = self.build_pending_file(user, unique_filename, uploaded_file)
+                    file_record.save()
+                    return file_record
+            except IntegrityError:
+                rejected.add(unique_filename.lower())
+        return None
+
+    def build_pending_file(self, user, filename, uploaded_file):
+        return File(
+            user=user,
+            filename=filename,
+            file_url='',  # set once the content is stored
+            file_size=uploaded_file.size,
+            is_encrypted=True,
+            upload_timestamp=timezone.now(),
+            status=File.STATUS_PENDING
+        )
+
+    def initial(self, request, *args, **kwargs):
+        # Upload handlers must be in place before authentication, which may parse
+        # the body for the CSRF check.
+        self.s3_client = get_s3_client()
+        self.upload_handler = S3MultipartUploadHandler(
+            request._request,
+            s3_client=self.s3_client,
+            bucket=AWS_BUCKET_NAME,
+            key_prefix=S3_STAGING_PREFIX,
+            max_size=FILE_UPLOAD_MAX_SIZE,
+            part_size=S3_MULTIPART_PART_SIZE,
+            extra_args={"ContentType": "text/plain", **get_encryption_args()},
+            codec=FILE_STORAGE_CODEC,
+            validate_text=True,
+            line_index_stride=LINE_INDEX_STRIDE
+        )
+        request._request.upload_handlers = [self.upload_handler]
+        super().initial(request, *args, **kwargs)
+
+    def discard_staged_file(self, s3_client, uploaded_file):
+        """Delete the staged object of an upload that will not be kept."""
+        if not uploaded_file.is_staged:
+            return
+        try:
+            s3_client.delete_object(Bucket=AWS_BUCKET_NAME, Key=uploaded_file.staged_key)
+        except ClientError as e:
+            logger.error(f"Failed to delete staged upload: {str(e)}")
+
+    def write_blob(self, s3_client, uploaded_file, blob_key):
+        """
+        Write the upload, and its line index, to its blob key, moving it server-side if it was staged.
+
+        Returns the Blob fields describing how the content was stored.
+        """
+        content_cache.invalidate(blob_key)
+        codec, stored_size = self.write_content(s3_client, uploaded_file, blob_key)
 
-        return new_filename
+        # Line ranges of compressed content cannot be read with a ranged GET.
+        has_line_index = not codec and uploaded_file.line_index is not None
+        if has_line_index:
+            s3_client.put_object(
+                Bucket=AWS_BUCKET_NAME,
+                Key=get_line_index_key(blob_key),
+                Body=json.dumps(uploaded_file.line_index).encode(),
+                ContentType="application/json",
+                **get_encryption_args()
+            )
+        return {"codec": codec, "stored_size": stored_size, "has_line_index": has_line_index}
+
+    def write_content(self, s3_client, uploaded_file, blob_key):
+        """Write the upload's bytes and return the codec they are stored with and their stored size."""
+        if uploaded_file.is_staged:
+            s3_client.copy(
+                {"Bucket": AWS_BUCKET_NAME, "Key": uploaded_file.staged_key},
+                AWS_BUCKET_NAME,
+                blob_key,
+                ExtraArgs=get_encryption_args()
+            )
+            return uploaded_file.codec, uploaded_file.stored_size or uploaded_file.size
+
+        extra_args = {"ContentType": "text/plain", **get_encryption_args()}
+        if uploaded_file.stored_content is not None:
+            # Compressed by the upload handler while the request was parsed.
+            if uploaded_file.codec:
+                extra_args["ContentEncoding"] = uploaded_file.codec
+            s3_client.put_object(Bucket=AWS_BUCKET_NAME, Key=blob_key, Body=uploaded_file.stored_content, **extra_args)
+            return uploaded_file.codec, len(uploaded_file.stored_content)
+
+        if not FILE_STORAGE_CODEC:
+            s3_client.upload_fileobj(uploaded_file, AWS_BUCKET_NAME, blob_key, ExtraArgs=extra_args)
+            return '', uploaded_file.size
+
+        uploaded_file.seek(0)
+        reader = CompressingReader(uploaded_file, FILE_STORAGE_CODEC)
+        s3_client.upload_fileobj(
+            reader,
+            AWS_BUCKET_NAME,
+            blob_key,
+            ExtraArgs={**extra_args, "ContentEncoding": FILE_STORAGE_CODEC}
+        )
+        return FILE_STORAGE_CODEC, reader.tell()
+
+    def store_blob(self, s3_client, uploaded_file):
+        """Store the upload as a content-addressed blob and return it, skipping the S3 write for known content."""
+        sha256 = uploaded_file.sha256 or compute_sha256(uploaded_file)
+        blob = acquire_blob(sha256)
+        if blob is None:
+            blob_fields = self.write_blob(s3_client, uploaded_file, get_blob_key(sha256))
+            blob = register_blob(sha256, uploaded_file.size, **blob_fields)
+        self.discard_staged_file(s3_client, uploaded_file)
+        return blob
+
+    def validate_file(self, uploaded_file):
+        """Return an error message if the upload breaks one of our rules, otherwise None."""
+        if not uploaded_file.name.endswith('.txt') or uploaded_file.content_type != 'text/plain':
+            return "Only .txt files are allowed."
+
+        if uploaded_file.size < FILE_UPLOAD_MIN_SIZE:
+            return f"File size is too small. Minimum size is {format_size(FILE_UPLOAD_MIN_SIZE)}."
+
+        if uploaded_file.size > FILE_UPLOAD_MAX_SIZE:
+            return f"File size exceeds {format_size(FILE_UPLOAD_MAX_SIZE)} limit."
+
+        if not self.is_text_file(uploaded_file):
+            return 'The file content must be plain text.'
+
+        return None
+
+    def save_upload(self, user, uploaded_file):
+        """Reserve a File row for a validated upload, write it to S3 and make it available."""
+        s3_client = self.s3_client
+        file_record = self.reserve_file(user, uploaded_file)
+        if file_record is None:
+            logger.error(f"Failed to reserve a unique filename for {uploaded_file.name}")
+            self.discard_staged_file(s3_client, uploaded_file)
+            return Response({"error": "File upload failed due to server error."}, status=500)
+
+        # The S3 transfer runs outside any transaction; only the pending row
+        # insert above and the status flip below touch the database.
+        try:
+            blob = self.store_blob(s3_client, uploaded_file)
+        except ClientError as e:
+            logger.error(f"Failed to upload file: {str(e)}")
+            self.discard_staged_file(s3_client, uploaded_file)
+            file_record.delete()
+            return Response({"error": "File upload failed due to server error."}, status=500)
+
+        if not make_available(file_record, blob):
+            # The reaper gave up on this row while the transfer was running.
+            logger.error(f"Pending upload {file_record.pk} was reaped before completion")
+            release_blob(blob.pk)
+            return Response({"error": "File upload failed due to server error."}, status=500)
+
+        return Response({"status": "File uploaded successfully"}, status=201)
 
     def post(self, request, *args, **kwargs):
-        serializer = FileUploadSerializer(data=request.data)
+        s3_client = self.s3_client
+        try:
+            serializer = FileUploadSerializer(data=request.data)
+        except ClientError as e:
+            logger.error(f"Failed to stream file to S3: {str(e)}")
+            return Response({"error": "File upload failed due to server error."}, status=500)
+
+        if self.upload_handler.oversized_files:
+            return Response({"error": f"File size exceeds {format_size(FILE_UPLOAD_MAX_SIZE)} limit."}, status=status.HTTP_400_BAD_REQUEST)
+
         if serializer.is_valid():
             uploaded_file = serializer.validated_data['file']
 
-            if not uploaded_file.name.endswith('.txt') or uploaded_file.content_type != 'text/plain':
-                return Response({"error": "Only .txt files are allowed."}, status=status.HTTP_400_BAD_REQUEST)
+            error = self.validate_file(uploaded_file)
+            if error:
+                self.discard_staged_file(s3_client, uploaded_file)
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
-            if uploaded_file.size < 512:
-                return Response({"error": "File size is too small. Minimum size is 0.5KB."}, status=status.HTTP_400_BAD_REQUEST)
+            return self.save_upload(request.user, uploaded_file)
 
-            if uploaded_file.size > 2048:
-                return Response({"error": "File size exceeds 2KB limit."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.errors, status=400)
 
-            if not self.is_text_file(uploaded_file):
-                return Response({'error': 'The file content must be plain text.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            unique_filename = self.generate_unique_filename(request.user, uploaded_file.name)
-            s3_client = get_s3_client()
-            hashed_user_id = hash_user_id(request.user.id)
-            file_key = f"{hashed_user_id}/{unique_filename}"
+class FileBatchUploadAPI(FileUploadAPI):
+    """Upload many files in one multipart request, sent under the ``files`` field."""
 
-            try:
-                with transaction.atomic():  
-                    s3_client.upload_fileobj(
-                        uploaded_file,
-                        AWS_BUCKET_NAME,
-                        file_key,
-                        ExtraArgs={
-                            "ContentType": "text/plain",
-                            "ServerSideEncryption": AWS_ENCRYPTION_TYPE,
-                            "SSEKMSKeyId": AWS_ENCRYPTION_KEY_ID
-                        }
-                    )
+    def reserve_files(self, user, uploaded_files):
+        """Insert pending File rows for every upload with one bulk_create, falling back to one insert each on a name race."""
+        reserved = set()
+        file_records = []
+        for uploaded_file in uploaded_files:
+            unique_filename = self.generate_unique_filename(user, uploaded_file.name, reserved)
+            reserved.add(unique_filename.lower())
+            file_records.append(self.build_pending_file(user, unique_filename, uploaded_file))
 
-                    file_url = f"https://{AWS_BUCKET_NAME}.s3.amazonaws.com/{file_key}"
-                    upload_timestamp = timezone.now()
+        try:
+            with transaction.atomic():
+                File.objects.bulk_create(file_records)
+                # MySQL does not return the new primary keys, so read the rows back to index them.
+                index_filenames(File.objects.filter(
+                    user=user,
+                    filename__in=[file_record.filename for file_record in file_records]
+                ).only('id', 'user_id', 'filename'))
+            return file_records
+        except IntegrityError:
+            return [self.reserve_file(user, uploaded_file) for uploaded_file in uploaded_files]
 
-                    File.objects.create(
-                        user=request.user,
-                        filename=unique_filename,
-                        file_url=file_url,
-                        file_size=uploaded_file.size,
-                        is_encrypted=True,
-                        upload_timestamp=upload_timestamp
-                    )
-                
-                return Response({"status": "File uploaded successfully"}, status=201)
+    def post(self, request, *args, **kwargs):
+        s3_client = self.s3_client
+        try:
+            uploaded_files = request.FILES.getlist('files')
+        except ClientError as e:
+            logger.error(f"Failed to stream file to S3: {str(e)}")
+            return Response({"error": "File upload failed due to server error."}, status=500)
+
+        if not uploaded_files and not self.upload_handler.oversized_files:
+            return Response({"files": ["No file was submitted."]}, status=400)
+
+        if len(uploaded_files) + len(self.upload_handler.oversized_files) > FILE_UPLOAD_BATCH_MAX_FILES:
+            for uploaded_file in uploaded_files:
+                self.discard_staged_file(s3_client, uploaded_file)
+            return Response({"error": f"At most {FILE_UPLOAD_BATCH_MAX_FILES} files can be uploaded at once."}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = {}
+        valid_files = []
+        for index, uploaded_file in enumerate(uploaded_files):
+            error = self.validate_file(uploaded_file)
+            if error:
+                self.discard_staged_file(s3_client, uploaded_file)
+                results[index] = {"file": uploaded_file.name, "error": error}
+            else:
+                valid_files.append((index, uploaded_file))
+
+        file_records = self.reserve_files(request.user, [uploaded_file for _, uploaded_file in valid_files])
+
+        uploads = []
+        for (index, uploaded_file), file_record in zip(valid_files, file_records):
+            if file_record is None:
+                self.discard_staged_file(s3_client, uploaded_file)
+                results[index] = {"file": uploaded_file.name, "error": "File upload failed due to server error."}
+                continue
+            sha256 = uploaded_file.sha256 or compute_sha256(uploaded_file)
+            # Known content only needs a reference, not an S3 write.
+            uploads.append({
+                "index": index,
+                "file": uploaded_file,
+                "record": file_record,
+                "sha256": sha256,
+                "blob": acquire_blob(sha256),
+            })
+
+        def write(upload):
+            try:
+                if upload["blob"] is None:
+                    upload["blob_fields"] = self.write_blob(s3_client, upload["file"], get_blob_key(upload["sha256"]))
+                return True
             except ClientError as e:
                 logger.error(f"Failed to upload file: {str(e)}")
-                return Response({"error": "File upload failed due to server error."}, status=500)
+                return False
+            finally:
+                self.discard_staged_file(s3_client, upload["file"])
 
-        return Response(serializer.errors, status=400)
+        # S3 transfers run concurrently and outside any transaction; the
+        # database only sees the bulk insert above and the statements below.
+        with ThreadPoolExecutor(max_workers=FILE_UPLOAD_BATCH_WORKERS) as executor:
+            written = list(executor.map(write, uploads))
+
+        stored = []
+        failed = []
+        for upload, ok in zip(uploads, written):
+            if not ok:
+                failed.append(upload)
+                continue
+            if upload["blob"] is None:
+                upload["blob"] = register_blob(upload["sha256"], upload["file"].size, **upload["blob_fields"])
+            stored.append(upload)
+
+        if failed:
+            File.objects.pending().filter(
+                user=request.user,
+                filename__in=[upload["record"].filename for upload in failed]
+            ).delete()
+
+        available_filenames = set()
+        if stored:
+            stored_filenames = [upload["record"].filename for upload in stored]
+            with transaction.atomic():
+                File.objects.pending().filter(user=request.user, filename__in=stored_filenames).update(
+                    status=File.STATUS_AVAILABLE,
+                    blob=Case(
+                        *[When(filename=upload["record"].filename, then=Value(upload["blob"].pk)) for upload in stored],
+                        output_field=BigIntegerField()
+                    ),
+                    file_url=Case(
+                        *[When(filename=upload["record"].filename, then=Value(get_object_url(get_blob_key(upload["sha256"])))) for upload in stored],
+                        output_field=CharField()
+                    )
+                )
+                file_list_cache.bump(request.user.pk)
+            available_filenames = set(
+                File.objects.available().filter(user=request.user, filename__in=stored_filenames).values_list('filename', flat=True)
+            )
+
+        for upload in stored:
+            if upload["record"].filename in available_filenames:
+                results[upload["index"]] = {"file": upload["file"].name, "status": "uploaded", "filename": upload["record"].filename}
+            else:
+                # The reaper gave up on this row while the transfer was running.
+                release_blob(upload["blob"].pk)
+                results[upload["index"]] = {"file": upload["file"].name, "error": "File upload failed due to server error."}
+        for upload in failed:
+            results[upload["index"]] = {"file": upload["file"].name, "error": "File upload failed due to server error."}
+
+        results = [results[index] for index in sorted(results)]
+        for filename in self.upload_handler.oversized_files:
+            results.append({"file": filename, "error": f"File size exceeds {format_size(FILE_UPLOAD_MAX_SIZE)} limit."})
+
+        uploaded_count = sum("error" not in result for result in results)
+        if uploaded_count == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif uploaded_count:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({"results": results}, status=response_status)
+
+
+class FilePresignedUploadAPI(APIView):
+    """Issue a presigned POST so the client can upload straight to S3, bypassing our workers."""
+    throttle_classes = [UserRateThrottle]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        filename = request.data.get('filename')
+        if not filename:
+            return Response({"filename": ["This field is required."]}, status=400)
+        if not filename.endswith('.txt'):
+            return Response({"error": "Only .txt files are allowed."}, status=status.HTTP_400_BAD_REQUEST)
+
+        key = f"{get_user_staging_prefix(request.user.id)}{uuid.uuid4().hex}"
+        fields = {
+            "Content-Type": "text/plain",
+            "x-amz-server-side-encryption": AWS_ENCRYPTION_TYPE,
+            "x-amz-server-side-encryption-aws-kms-key-id": AWS_ENCRYPTION_KEY_ID,
+        }
+        conditions = [
+            ["content-length-range", FILE_UPLOAD_MIN_SIZE, FILE_UPLOAD_MAX_SIZE],
+            *({name: value} for name, value in fields.items()),
+        ]
+
+        try:
+            presigned_post = get_s3_client().generate_presigned_post(
+                AWS_BUCKET_NAME,
+                key,
+                Fields=fields,
+                Conditions=conditions,
+                ExpiresIn=PRESIGNED_UPLOAD_EXPIRY
+            )
+        except ClientError as e:
+            logger.error(f"Failed to presign upload: {str(e)}")
+            return Response({"error": "File upload failed due to server error."}, status=500)
+
+        return Response({"url": presigned_post['url'], "fields": presigned_post['fields'], "key": key}, status=200)
+
+
+class FileUploadCompleteAPI(FileUploadAPI):
+    """Validate an object uploaded with a presigned POST and register it as a File."""
+
+    def scan_content(self, uploaded_file, line_index):
+        """Hash, validate and line-index the staged object while streaming it from S3, stopping at the first invalid byte."""
+        body = self.s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=uploaded_file.staged_key)['Body']
+        try:
+            return scan_text(body.iter_chunks(), line_index)
+        finally:
+            body.close()
+
+    def post(self, request, *args, **kwargs):
+        s3_client = self.s3_client
+        key = request.data.get('key', '')
+        filename = request.data.get('filename')
+        if not filename:
+            return Response({"filename": ["This field is required."]}, status=400)
+        if not key.startswith(get_user_staging_prefix(request.user.id)) or '..' in key:
+            return handle_file_not_found()
+
+        try:
+            head = s3_client.head_object(Bucket=AWS_BUCKET_NAME, Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return handle_file_not_found()
+            logger.error(f"Failed to inspect uploaded file: {str(e)}")
+            return Response({"error": "File upload failed due to server error."}, status=500)
+
+        uploaded_file = S3UploadedFile(
+            file=io.BytesIO(),
+            name=filename,
+            content_type=head.get('ContentType', ''),
+            size=head['ContentLength'],
+            charset=None,
+            staged_key=key
+        )
+        try:
+            error = self.validate_file(uploaded_file)
+        except ClientError as e:
+            logger.error(f"Failed to inspect uploaded file: {str(e)}")
+            return Response({"error": "File upload failed due to server error."}, status=500)
+        if error:
+            self.discard_staged_file(s3_client, uploaded_file)
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        return self.save_upload(request.user, uploaded_file)
+
+
+def upload_session_response(upload_session, status_code=200):
+    response = Response({
+        "session_id": str(upload_session.id),
+        "filename": upload_session.filename,
+        "size": upload_session.size,
+        "offset": upload_session.offset,
+    }, status=status_code)
+    response['Upload-Offset'] = str(upload_session.offset)
+    return response
+
+
+def handle_staged_upload_gone():
+    """The session row exists but its staged bytes do not, e.g. after expiry or on another host."""
+    return Response({"error": "The uploaded data of this session is no longer available."}, status=status.HTTP_410_GONE)
+
+
+class FileUploadSessionAPI(APIView):
+    """Start a resumable upload. The client then PATCHes chunks and finally completes the session."""
+    throttle_classes = [UserRateThrottle]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        filename = request.data.get('filename')
+        try:
+            size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            return Response({"size": ["A valid integer is required."]}, status=400)
+        if not filename:
+            return Response({"filename": ["This field is required."]}, status=400)
+
+        if not filename.endswith('.txt'):
+            return Response({"error": "Only .txt files are allowed."}, status=status.HTTP_400_BAD_REQUEST)
+        if size < FILE_UPLOAD_MIN_SIZE:
+            return Response({"error": f"File size is too small. Minimum size is {format_size(FILE_UPLOAD_MIN_SIZE)}."}, status=status.HTTP_400_BAD_REQUEST)
+        if size > FILE_UPLOAD_MAX_SIZE:
+            return Response({"error": f"File size exceeds {format_size(FILE_UPLOAD_MAX_SIZE)} limit."}, status=status.HTTP_400_BAD_REQUEST)
+
+        upload_session = UploadSession.objects.create(user=request.user, filename=filename, size=size)
+        path = get_upload_session_path(upload_session.id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+        return upload_session_response(upload_session, status_code=201)
+
+
+class FileUploadSessionDetailAPI(APIView):
+    """Query the offset of a resumable upload, append a chunk at that offset, or cancel it."""
+    throttle_classes = [UserRateThrottle]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, session_id, *args, **kwargs):
+        try:
+            upload_session = UploadSession.objects.get(id=session_id, user=request.user)
+        except UploadSession.DoesNotExist:
+            return handle_file_not_found()
+        return upload_session_response(upload_session)
+
+    def patch(self, request, session_id, *args, **kwargs):
+        try:
+            upload_session = UploadSession.objects.get(id=session_id, user=request.user)
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except UploadSession.DoesNotExist:
+            return handle_file_not_found()
+        except ValueError:
+            return Response({"error": "The Upload-Offset header is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            staged_file = open(get_upload_session_path(upload_session.id), 'r+b')
+        except FileNotFoundError:
+            return handle_staged_upload_gone()
+
+        stream = request.stream
+        with staged_file:
+            try:
+                fcntl.flock(staged_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return upload_session_response(upload_session, status_code=status.HTTP_409_CONFLICT)
+
+            # Another PATCH may have finished between the read above and taking the lock.
+            try:
+                upload_session.refresh_from_db(fields=['offset'])
+            except UploadSession.DoesNotExist:
+                return handle_file_not_found()
+            if offset != upload_session.offset:
+                return upload_session_response(upload_session, status_code=status.HTTP_409_CONFLICT)
+
+            remaining = upload_session.size - offset
+            received = 0
+            # Drop any bytes a previous, interrupted PATCH wrote past the recorded offset.
+            staged_file.seek(offset)
+            staged_file.truncate()
+            while stream is not None:
+                chunk = stream.read(UPLOAD_SESSION_CHUNK_SIZE)
+                if not chunk:
+                    break
+                received += len(chunk)
+                if received > remaining:
+                    staged_file.truncate(offset)
+                    return Response({"error": "Chunk exceeds the declared upload size."}, status=status.HTTP_400_BAD_REQUEST)
+                staged_file.write(chunk)
+            staged_file.flush()
+
+            # Recorded while the lock is held, so the next PATCH sees the new offset.
+            if not UploadSession.objects.filter(pk=upload_session.pk, offset=offset).update(
+                offset=offset + received,
+                updated_at=timezone.now()
+            ):
+                staged_file.truncate(offset)
+                return Response({"error": "The upload session changed while the chunk was written."}, status=status.HTTP_409_CONFLICT)
+
+        upload_session.offset = offset + received
+        return upload_session_response(upload_session)
+
+    def delete(self, request, session_id, *args, **kwargs):
+        try:
+            upload_session = UploadSession.objects.get(id=session_id, user=request.user)
+        except UploadSession.DoesNotExist:
+            return handle_file_not_found()
+        get_upload_session_path(upload_session.id).unlink(missing_ok=True)
+        upload_session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class FileUploadSessionCompleteAPI(FileUploadAPI):
+    """Validate a fully received resumable upload and store it like any other upload."""
+
+    def post(self, request, session_id, *args, **kwargs):
+        try:
+            upload_session = UploadSession.objects.get(id=session_id, user=request.user)
+        except UploadSession.DoesNotExist:
+            return handle_file_not_found()
+
+        if upload_session.offset != upload_session.size:
+            return upload_session_response(upload_session, status_code=status.HTTP_409_CONFLICT)
+
+        path = get_upload_session_path(upload_session.id)
+        try:
+            staged_file = open(path, 'rb')
+        except FileNotFoundError:
+            return handle_staged_upload_gone()
+
+        with staged_file:
+            uploaded_file = S3UploadedFile(
+                file=staged_file,
+                name=upload_session.filename,
+                content_type='text/plain',
+                size=upload_session.size,
+                charset=None
+            )
+            error = self.validate_file(uploaded_file)
+            if error:
+                response = Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+            else:
+                response = self.save_upload(request.user, uploaded_file)
+
+        if response.status_code != 500:
+            path.unlink(missing_ok=True)
+            upload_session.delete()
+        return response
 
 
 class FileDownloadAPI(APIView):
+    """
+    Download a file, honouring single and multiple byte ranges for files stored uncompressed.
+
+    In the "redirect" FILE_DOWNLOAD_MODE the bytes are not proxied: after the
+    ownership check and access log the client is sent to a presigned S3 URL.
+    """
     throttle_classes = [UserRateThrottle]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, file_name, *args, **kwargs):
         s3_client = get_s3_client()
         decoded_filename = unquote(file_name)  
-        hashed_user_id = hash_user_id(request.user.id)
-        file_key = f"{hashed_user_id}/{decoded_filename}"  
 
         try:
-            with transaction.atomic():  
-                
-                file_record = File.objects.get(filename=decoded_filename, user=request.user)
-                file_object = s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=file_key)
-                file_content = file_object['Body'].read()
+            file_record = File.objects.available().select_related('blob').get(filename=decoded_filename, user=request.user)
+            key = get_object_key(file_record)
+            codec = get_object_codec(file_record)
+            # Clients that accept the stored codec get the compressed bytes as they are.
+            content_encoding = codec if codec and accepts_encoding(request, codec) else None
 
-                FileAccessLog.objects.create(
+            # Answered from the database row, before S3 is touched.
+            etag = get_file_etag(file_record, content_encoding)
+            last_modified = get_last_modified(file_record)
+            not_modified = conditional_response(request, etag, last_modified)
+            if not_modified is not None:
+                if codec:
+                    patch_vary_headers(not_modified, ('Accept-Encoding',))
+                return not_modified
+
+            # S3 serves compressed objects with their Content-Encoding as stored,
+            # so clients that cannot decode it are proxied instead.
+            if FILE_DOWNLOAD_MODE == 'redirect' and (not codec or content_encoding):
+                access_log.record(
                     file=file_record,
                     user=request.user,
                     access_type="download"
                 )
+                response = HttpResponseRedirect(get_presigned_download_url(key, decoded_filename))
+                if codec:
+                    patch_vary_headers(response, ('Accept-Encoding',))
+                return response
+
+            # Offsets into compressed content do not map onto the stored bytes,
+            # so compressed files are always sent whole.
+            ranges = None
+            if not codec and 'Range' in request.headers and if_range_matches(request, etag, last_modified):
+                ranges = parse_range_header(request.headers['Range'], file_record.file_size)
+            if ranges == []:
+                response = HttpResponse("Requested range not satisfiable.", status=416)
+                response['Content-Range'] = f"bytes */{file_record.file_size}"
+                return response
+
+            if ranges is None:
+                response = self.full_response(s3_client, key, file_record, codec, content_encoding)
+            elif len(ranges) == 1:
+                response = self.range_response(s3_client, key, file_record, *ranges[0])
+            else:
+                response = self.multipart_response(s3_client, key, file_record, ranges)
+
+            access_log.record(
+                file=file_record,
+                user=request.user,
+                access_type="download"
+            )
 
-            response = HttpResponse(file_content, content_type='text/plain')
             response['Content-Disposition'] = f'attachment; filename="{decoded_filename}"'
-            return response
+            response['Accept-Ranges'] = 'none' if codec else 'bytes'
+            return set_validators(response, etag, last_modified)
         except File.DoesNotExist:
             return handle_file_not_found()
         except ClientError as e:
             logger.error(f"Failed to download file: {str(e)}")
             return HttpResponse("Failed to retrieve file.", status=500)
 
+    def full_response(self, s3_client, key, file_record, codec, content_encoding):
+        # Small objects are served from, or added to, the content cache; larger ones are streamed.
+        etag = get_file_etag(file_record)
+        data = content_cache.get(key, etag)
+        if data is None:
+            file_object = s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=key)
+            if file_object['ContentLength'] <= content_cache.max_item_bytes:
+                data = file_object['Body'].read()
+                content_cache.set(key, etag, data)
+
+        if data is None:
+            stored_size = file_object['ContentLength']
+            chunks = stream_object(file_object['Body'], '' if content_encoding else codec)
+        else:
+            stored_size = len(data)
+            chunks = iter_decompressed([data], codec) if codec and not content_encoding else [data]
+
+        response = StreamingHttpResponse(chunks, content_type='text/plain')
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+            response['Content-Length'] = stored_size
+        else:
+            response['Content-Length'] = file_record.file_size
+        if codec:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def range_response(self, s3_client, key, file_record, start, end):
+        file_object = s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=key, Range=f"bytes={start}-{end}")
+        response = StreamingHttpResponse(stream_object(file_object['Body']), status=206, content_type='text/plain')
+        response['Content-Range'] = content_range(start, end, file_record.file_size)
+        response['Content-Length'] = end - start + 1
+        return response
+
+    def multipart_response(self, s3_client, key, file_record, ranges):
+        boundary = uuid.uuid4().hex
+        part_headers = [
+            (
+                f"--{boundary}\r\n"
+                f"Content-Type: text/plain\r\n"
+                f"Content-Range: {content_range(start, end, file_record.file_size)}\r\n\r\n"
+            ).encode()
+            for start, end in ranges
+        ]
+        closing = f"--{boundary}--\r\n".encode()
+
+        def stream_parts():
+            # Each part is its own ranged GET, issued only when the client gets to it.
+            for part_header, (start, end) in zip(part_headers, ranges):
+                yield part_header
+                try:
+                    file_object = s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=key, Range=f"bytes={start}-{end}")
+                except ClientError as e:
+                    logger.error(f"Failed to download file range: {str(e)}")
+                    return
+                yield from stream_object(file_object['Body'])
+                yield b"\r\n"
+            yield closing
+
+        response = StreamingHttpResponse(
+            stream_parts(),
+            status=206,
+            content_type=f"multipart/byteranges; boundary={boundary}"
+        )
+        response['Content-Length'] = sum(
+            len(part_header) + end - start + 1 + 2 for part_header, (start, end) in zip(part_headers, ranges)
+        ) + len(closing)
+        return response
+
 
 class FileListAPI(APIView):
+    """
+    Return the user's files newest first, one page per ``cursor``.
+
+    Pages are read by keyset on ``(upload_timestamp, id)``, so every page costs
+    the same however many files the user has. Rows are read with ``values()``
+    and serialized without building model instances, and pages are served
+    from the list cache until the user's files change.
+    """
     throttle_classes = [UserRateThrottle]
     permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     def get(self, request, *args, **kwargs):
-        files = File.objects.filter(user=request.user)
-        serializer = FileSerializer(files, many=True)
-        return Response({"files": serializer.data}, status=200)
+        limit = get_page_size(request.query_params, FILE_LIST_PAGE_SIZE, FILE_LIST_MAX_PAGE_SIZE)
+        if limit is None:
+            return Response({"error": f"limit must be an integer between 1 and {FILE_LIST_MAX_PAGE_SIZE}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            files, next_cursor, etag = get_file_list_page(request.user, request.query_params.get('cursor'), limit)
+        except InvalidCursor:
+            return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        return set_validators(Response({"files": files, "next_cursor": next_cursor}, status=200), etag)
 
 
 class FileContentAPI(APIView):
+    """
+    Return a file's text, or with ``offset``/``limit`` a page of its lines.
+
+    Pages of files with a line index cost one ranged S3 read each.
+    """
     throttle_classes = [UserRateThrottle]
     permission_classes = [IsAuthenticated]
 
@@ -217,25 +1141,172 @@ class FileContentAPI(APIView):
         s3_client = get_s3_client()
 
         decoded_filename = unquote(file_name)  
-        hashed_user_id = hash_user_id(request.user.id)
-        file_key = f"{hashed_user_id}/{decoded_filename}"  
+
+        paginate = 'offset' in request.query_params or 'limit' in request.query_params
+        if paginate:
+            try:
+                offset = int(request.query_params.get('offset', 0))
+                limit = int(request.query_params.get('limit', FILE_CONTENT_MAX_LINES))
+            except ValueError:
+                return Response({"error": "offset and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+            if offset < 0 or not 1 <= limit <= FILE_CONTENT_MAX_LINES:
+                return Response({"error": f"offset must not be negative and limit must be between 1 and {FILE_CONTENT_MAX_LINES}."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            with transaction.atomic():  
-                
-                file_record = File.objects.get(filename=decoded_filename, user=request.user)
-                file_object = s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=file_key)
-                file_content = file_object['Body'].read().decode('utf-8')
-                
-                FileAccessLog.objects.create(
-                    file=file_record,
-                    user=request.user,
-                    access_type="view"
-                )
+            file_record = File.objects.available().select_related('blob').get(filename=decoded_filename, user=request.user)
+            etag = get_file_etag(file_record)
+            last_modified = get_last_modified(file_record)
+            not_modified = conditional_response(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
 
-            return Response({"file_name": decoded_filename, "content": file_content}, status=200)
+            if paginate:
+                lines, total_lines = self.read_lines(s3_client, file_record, etag, offset, limit)
+                next_offset = offset + len(lines)
+                data = {
+                    "file_name": decoded_filename,
+                    "content": b''.join(lines).decode('utf-8'),
+                    "offset": offset,
+                    "limit": limit,
+                    "total_lines": total_lines,
+                    "next_offset": next_offset if next_offset < total_lines else None,
+                }
+            else:
+                stored_content = read_object(s3_client, get_object_key(file_record), etag)
+                file_content = decompress(stored_content, get_object_codec(file_record)).decode('utf-8')
+                data = {"file_name": decoded_filename, "content": file_content}
+
+            access_log.record(
+                file=file_record,
+                user=request.user,
+                access_type="view"
+            )
+
+            response = Response(data, status=200)
+            return set_validators(response, etag, last_modified)
         except File.DoesNotExist:
             return handle_file_not_found()
         except ClientError as e:
             logger.error(f"Failed to retrieve file content: {str(e)}")
             return Response({"error": "File retrieval failed."}, status=500)
+
+    def read_lines(self, s3_client, file_record, etag, offset, limit):
+        """Return lines ``offset`` to ``offset + limit`` as bytes, and the file's line count."""
+        key = get_object_key(file_record)
+        if file_record.blob_id is None or not file_record.blob.has_line_index:
+            lines = split_lines(decompress(read_object(s3_client, key, etag), get_object_codec(file_record)))
+            return lines[offset:offset + limit], len(lines)
+
+        index = json.loads(read_object(s3_client, get_line_index_key(key), etag))
+        line_range = get_line_range(index, offset, limit)
+        if line_range is None:
+            return [], index["lines"]
+
+        start, end, skip = line_range
+        cached = content_cache.get(key, etag)
+        if cached is not None:
+            data = cached[start:end]
+        else:
+            data = s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=key, Range=f"bytes={start}-{end - 1}")['Body'].read()
+        return split_lines(data)[skip:skip + limit], index["lines"]
+
+
+class FileSearchAPI(APIView):
+    """
+    Search the user's files by name, ordered by name.
+
+    ``mode=prefix`` matches the start of names through the (user, filename)
+    index; the default ``mode=contains`` matches anywhere through the filename
+    trigram index and needs at least three characters.
+    """
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'file_search'
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        mode = request.query_params.get('mode', 'contains')
+        if mode not in ('prefix', 'contains'):
+            return Response({"error": "mode must be prefix or contains."}, status=status.HTTP_400_BAD_REQUEST)
+        if not query:
+            return Response({"error": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if mode == 'contains' and len(query) < FILE_SEARCH_MIN_LENGTH:
+            return Response({"error": f"Substring search needs at least {FILE_SEARCH_MIN_LENGTH} characters; use mode=prefix for shorter queries."}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = get_page_size(request.query_params, FILE_SEARCH_PAGE_SIZE, FILE_SEARCH_MAX_PAGE_SIZE)
+        if limit is None:
+            return Response({"error": f"limit must be an integer between 1 and {FILE_SEARCH_MAX_PAGE_SIZE}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        files = File.objects.available().filter(user=request.user)
+        if mode == 'prefix':
+            files = files.filter(filename__istartswith=query)
+        else:
+            files = filter_by_substring(files, request.user, query)
+
+        rows = files.order_by('filename').values(*FileSerializer.Meta.fields)[:limit]
+        return Response({"files": serialize_rows(FileSerializer, rows)}, status=200)
+
+
+class CacheStatsAPI(APIView):
+    """Hit and miss counters of this process's caches, and its S3 client lookups, for staff."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response({
+            "content_cache": content_cache.stats(),
+            "file_list_cache": file_list_cache.stats(),
+            "s3_clients": s3_clients.stats(),
+        }, status=200)
+
+
+class AccessStatsAPI(APIView):
+    """
+    Base for the access statistics views: counts by access type, and the most
+    recent accesses newest first, one page per ``cursor``.
+    """
+    throttle_classes = [UserRateThrottle]
+    permission_classes = [IsAuthenticated]
+
+    def stats_response(self, request, logs, rollups, **extra):
+        limit = get_page_size(request.query_params, ACCESS_HISTORY_PAGE_SIZE, ACCESS_HISTORY_MAX_PAGE_SIZE)
+        if limit is None:
+            return Response({"error": f"limit must be an integer between 1 and {ACCESS_HISTORY_MAX_PAGE_SIZE}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            accesses, next_cursor = paginate_keyset(
+                logs.select_related('file'), ('access_timestamp', 'id'), request.query_params.get('cursor'), limit
+            )
+        except InvalidCursor:
+            return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            **extra,
+            "counts": count_accesses(logs, rollups),
+            "accesses": FileAccessLogSerializer(accesses, many=True).data,
+            "next_cursor": next_cursor,
+        }, status=200)
+
+
+class FileAccessStatsAPI(AccessStatsAPI):
+    def get(self, request, file_name, *args, **kwargs):
+        decoded_filename = unquote(file_name)
+        try:
+            file_record = File.objects.available().get(filename=decoded_filename, user=request.user)
+        except File.DoesNotExist:
+            return handle_file_not_found()
+
+        return self.stats_response(
+            request,
+            FileAccessLog.objects.filter(file=file_record),
+            FileAccessRollup.objects.filter(file=file_record),
+            file_name=decoded_filename
+        )
+
+
+class UserAccessStatsAPI(AccessStatsAPI):
+    def get(self, request, *args, **kwargs):
+        return self.stats_response(
+            request,
+            FileAccessLog.objects.filter(user=request.user),
+            FileAccessRollup.objects.filter(user=request.user)
+        )
@@ -4,43 +4,46 @@ var KTFileManagerList = function () {
     var datatable;
     var table
 
-    var uploadTemplate;
+    var nameTemplate;
     var actionTemplate;
-    var checkboxTemplate;
 
 
     const initTemplates = () => {
-        uploadTemplate = document.querySelector('[data-kt-filemanager-template="upload"]');
+        nameTemplate = document.querySelector('[data-kt-filemanager-template="name"]');
         actionTemplate = document.querySelector('[data-kt-filemanager-template="action"]');
-        checkboxTemplate = document.querySelector('[data-kt-filemanager-template="checkbox"]');
     }
 
-    const initDatatable = () => {
-        const tableRows = table.querySelectorAll('tbody tr');
-
-        tableRows.forEach(row => {
-            const dateRow = row.querySelectorAll('td');
-            const dateCol = dateRow[3];
-            const realDate = moment(dateCol.innerHTML, "DD MMM YYYY, LT").format();
-            dateCol.setAttribute('data-order', realDate);
-        });
+    const renderName = (data, type) => {
+        if (type !== 'display') {
+            return data;
+        }
+        const cell = nameTemplate.content.firstElementChild.cloneNode(true);
+        cell.querySelector('a').textContent = data;
+        return cell.outerHTML;
+    }
 
+    const initDatatable = () => {
+        // The server renders the first page; later pages, searches and sorts are fetched from the API.
         const filesListOptions = {
             "info": false,
-            'order': [],
-            'pageLength': 5,
+            'pageLength': parseInt(table.dataset.pageLength, 10),
             "paging": true,
             "lengthChange": false,
             'ordering': true,
             'order': [[2, 'desc']],
+            'serverSide': true,
+            'deferLoading': parseInt(table.dataset.totalFiles, 10),
+            'ajax': {
+                url: '/api/files/table/',
+            },
             'columnDefs': [
-                { orderable: false, targets: 3 },               
+                { orderable: false, targets: 3 },
             ],
             'columns': [
-                { data: 'name' },
+                { data: 'name', render: renderName },
                 { data: 'size' },
                 { data: 'date' },
-                { data: 'action' },
+                { data: null, render: () => actionTemplate.innerHTML },
             ]
         };
 
@@ -58,8 +61,11 @@ var KTFileManagerList = function () {
 
     const handleSearchDatatable = () => {
         const filterSearch = document.querySelector('[data-kt-filemanager-table-filter="search"]');
+        let searchTimeout;
         filterSearch.addEventListener('keyup', function (e) {
-            datatable.search(e.target.value).draw();
+            // Wait for a pause in typing so each keystroke does not cost a request.
+            clearTimeout(searchTimeout);
+            searchTimeout = setTimeout(() => datatable.search(e.target.value).draw(), 300);
         });
     }
 
@@ -92,7 +98,7 @@ var KTFileManagerList = function () {
 
     const countTotalItems = () => {
         const counter = document.getElementById('kt_file_manager_items_counter');
-        const itemCount = datatable.rows().count();
+        const itemCount = datatable.page.info().recordsTotal;
         counter.innerText = itemCount + ' ' + (itemCount === 1 ? 'file' : 'files');
     }
 
@@ -203,72 +209,70 @@ var KTFileManagerList = function () {
     }
 
     const handleFileContentDisplay = () => {
-        table.querySelectorAll('tbody tr').forEach(row => {
-            const fileNameLink = row.querySelector('td a');
-            const viewOption = row.querySelector('[data-action="view"]');
-            const downloadOption = row.querySelector('[data-action="download"]'); 
-    
-            const displayFileContent = async () => {
-                const fileName = fileNameLink.textContent.trim();
-                const fileContentDisplay = document.getElementById('file_content_display');
-                const fileContentSection = document.getElementById('file_content_section');
-                const fileContentTitle = document.getElementById('file_content_title');
-    
-                if (!fileContentSection.classList.contains('d-none') && fileContentTitle.textContent.includes(fileName)) {
-                    return; 
-                }
-    
-                KTApp.showPageLoading();
-    
-                try {
-                    const response = await axios.get(`/api/file-content/${fileName}/`);
-                    const content = response.data.content;
-                    KTApp.hidePageLoading();
-    
-                    fileContentTitle.innerText = `File Content: ${fileName}`;
-                    fileContentDisplay.innerText = content;
-                    fileContentSection.classList.remove('d-none');
-    
-                    const searchInput = document.getElementById('search_content');
-                    searchInput.value = '';
-                    searchInput.addEventListener('keyup', () => highlightSearch(content));
-                } catch (error) {
-                    KTApp.hidePageLoading();
-                    console.error("Error fetching file content:", error);
-                }
-            };
-    
-            
-            fileNameLink.addEventListener('click', (event) => {
+        const displayFileContent = async (fileName) => {
+            const fileContentDisplay = document.getElementById('file_content_display');
+            const fileContentSection = document.getElementById('file_content_section');
+            const fileContentTitle = document.getElementById('file_content_title');
+
+            if (!fileContentSection.classList.contains('d-none') && fileContentTitle.textContent.includes(fileName)) {
+                return; 
+            }
+
+            KTApp.showPageLoading();
+
+            try {
+                const response = await axios.get(`/api/file-content/${fileName}/`);
+                const content = response.data.content;
+                KTApp.hidePageLoading();
+
+                fileContentTitle.innerText = `File Content: ${fileName}`;
+                fileContentDisplay.innerText = content;
+                fileContentSection.classList.remove('d-none');
+
+                const searchInput = document.getElementById('search_content');
+                searchInput.value = '';
+                searchInput.addEventListener('keyup', () => highlightSearch(content));
+            } catch (error) {
+                KTApp.hidePageLoading();
+                console.error("Error fetching file content:", error);
+            }
+        };
+
+        const downloadFile = async (fileName) => {
+            try {
+                const response = await axios.get(`/api/download/${fileName}/`, {
+                    responseType: 'blob' 
+                });
+
+                const url = window.URL.createObjectURL(new Blob([response.data]));
+                const link = document.createElement('a');
+                link.href = url;
+                link.setAttribute('download', fileName); 
+                document.body.appendChild(link);
+                link.click();
+
+                
+                link.remove();
+                window.URL.revokeObjectURL(url);
+            } catch (error) {
+                console.error("Error downloading file:", error);
+            }
+        };
+
+        // Rows are replaced on every draw, so listen on the table rather than on each row.
+        table.addEventListener('click', (event) => {
+            const row = event.target.closest('tbody tr');
+            if (!row) {
+                return;
+            }
+            const fileName = row.querySelector('td a').textContent.trim();
+
+            if (event.target.closest('[data-action="download"]')) {
+                downloadFile(fileName);
+            } else if (event.target.closest('[data-action="view"]') || event.target.closest('td:first-child a')) {
                 event.preventDefault();
-                displayFileContent();
-            });
-    
-            
-            viewOption.addEventListener('click', displayFileContent);
-    
-            
-            downloadOption.addEventListener('click', async () => {
-                const fileName = fileNameLink.textContent.trim();
-                try {
-                    const response = await axios.get(`/api/download/${fileName}/`, {
-                        responseType: 'blob' 
-                    });
-    
-                    const url = window.URL.createObjectURL(new Blob([response.data]));
-                    const link = document.createElement('a');
-                    link.href = url;
-                    link.setAttribute('download', fileName); 
-                    document.body.appendChild(link);
-                    link.click();
-    
-                    
-                    link.remove();
-                    window.URL.revokeObjectURL(url);
-                } catch (error) {
-                    console.error("Error downloading file:", error);
-                }
-            });
+                displayFileContent(fileName);
+            }
         });
     };
     